@@ -41,10 +41,16 @@ class Ui_Dialog(object):
         self.label.setSizePolicy(sizePolicy)
         self.label.setObjectName("label")
         self.verticalLayout.addWidget(self.label)
-        self.listWidget = QListWidget(Dialog)
-        self.listWidget.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
-        self.listWidget.setObjectName("listWidget")
-        self.verticalLayout.addWidget(self.listWidget)
+        self.searchEdit = QLineEdit(Dialog)
+        self.searchEdit.setClearButtonEnabled(True)
+        self.searchEdit.setObjectName("searchEdit")
+        self.verticalLayout.addWidget(self.searchEdit)
+        self.deckTree = QTreeView(Dialog)
+        self.deckTree.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
+        self.deckTree.setUniformRowHeights(True)
+        self.deckTree.setObjectName("deckTree")
+        self.deckTree.header().setVisible(False)
+        self.verticalLayout.addWidget(self.deckTree)
         self.label_2 = QLabel(Dialog)
         sizePolicy = QSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Preferred)
         sizePolicy.setHorizontalStretch(0)
@@ -80,6 +86,10 @@ class Ui_Dialog(object):
         self.calendarWidget.setGridVisible(True)
         self.calendarWidget.setObjectName("calendarWidget")
         self.verticalLayout_2.addWidget(self.calendarWidget)
+        self.previewLabel = QLabel(Dialog)
+        self.previewLabel.setWordWrap(True)
+        self.previewLabel.setObjectName("previewLabel")
+        self.verticalLayout_2.addWidget(self.previewLabel)
         self.horizontalLayout.addLayout(self.verticalLayout_2)
         self.verticalLayout_3 = QVBoxLayout()
         self.verticalLayout_3.setObjectName("verticalLayout_3")
@@ -99,6 +109,7 @@ class Ui_Dialog(object):
         _translate = QCoreApplication.translate
         Dialog.setWindowTitle(_translate("Dialog", "Add new Deadline"))
         self.label.setText(_translate("Dialog", "Select the Decks you want to add a deadline to:"))
+        self.searchEdit.setPlaceholderText(_translate("Dialog", "Filter decks"))
         self.label_2.setText(_translate("Dialog", "Note: The deadline is when you will see all NEW cards by"))
         self.label_4.setText(_translate("Dialog", "Note2: If you select a \"Meta\" Deck, it will only apply to sub-decks (when checked)"))
         self.label_3.setText(_translate("Dialog", "Select your deadline date:"))
@@ -20,16 +20,20 @@ class Ui_Dialog(object):
         self.verticalLayout.setObjectName("verticalLayout")
         self.horizontalLayout = QHBoxLayout()
         self.horizontalLayout.setObjectName("horizontalLayout")
-        self.fieldList = QListWidget(Dialog)
+        self.deadlineTable = QTableView(Dialog)
         sizePolicy = QSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.MinimumExpanding)
         sizePolicy.setHorizontalStretch(0)
         sizePolicy.setVerticalStretch(0)
-        sizePolicy.setHeightForWidth(self.fieldList.sizePolicy().hasHeightForWidth())
-        self.fieldList.setSizePolicy(sizePolicy)
-        self.fieldList.setMinimumSize(QSize(50, 60))
-        self.fieldList.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
-        self.fieldList.setObjectName("fieldList")
-        self.horizontalLayout.addWidget(self.fieldList)
+        sizePolicy.setHeightForWidth(self.deadlineTable.sizePolicy().hasHeightForWidth())
+        self.deadlineTable.setSizePolicy(sizePolicy)
+        self.deadlineTable.setMinimumSize(QSize(50, 60))
+        self.deadlineTable.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
+        self.deadlineTable.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.deadlineTable.setSortingEnabled(True)
+        self.deadlineTable.setObjectName("deadlineTable")
+        self.deadlineTable.horizontalHeader().setStretchLastSection(True)
+        self.deadlineTable.verticalHeader().setVisible(False)
+        self.horizontalLayout.addWidget(self.deadlineTable)
         self.verticalLayout_3 = QVBoxLayout()
         self.verticalLayout_3.setObjectName("verticalLayout_3")
         self.AddDeadlineButton = QPushButton(Dialog)
@@ -45,17 +49,16 @@ class Ui_Dialog(object):
         self.verticalLayout_3.addItem(spacerItem)
         self.horizontalLayout.addLayout(self.verticalLayout_3)
         self.verticalLayout.addLayout(self.horizontalLayout)
-        self.horizontalLayout_3 = QHBoxLayout()
-        self.horizontalLayout_3.setObjectName("horizontalLayout_3")
-        self.OneOrManyLabel = QLabel(Dialog)
-        self.OneOrManyLabel.setObjectName("OneOrManyLabel")
-        self.horizontalLayout_3.addWidget(self.OneOrManyLabel)
-        self.OneOrManyBox = QComboBox(Dialog)
-        self.OneOrManyBox.setObjectName("OneOrManyBox")
-        self.OneOrManyBox.addItem("")
-        self.OneOrManyBox.addItem("")
-        self.horizontalLayout_3.addWidget(self.OneOrManyBox)
-        self.verticalLayout.addLayout(self.horizontalLayout_3)
+        self.horizontalLayout_5 = QHBoxLayout()
+        self.horizontalLayout_5.setObjectName("horizontalLayout_5")
+        self.BudgetLabel = QLabel(Dialog)
+        self.BudgetLabel.setObjectName("BudgetLabel")
+        self.horizontalLayout_5.addWidget(self.BudgetLabel)
+        self.BudgetBox = QSpinBox(Dialog)
+        self.BudgetBox.setMaximum(9999)
+        self.BudgetBox.setObjectName("BudgetBox")
+        self.horizontalLayout_5.addWidget(self.BudgetBox)
+        self.verticalLayout.addLayout(self.horizontalLayout_5)
         self.horizontalLayout_4 = QHBoxLayout()
         self.horizontalLayout_4.setSpacing(2)
         self.horizontalLayout_4.setObjectName("horizontalLayout_4")
@@ -80,7 +83,7 @@ class Ui_Dialog(object):
         self.buttonBox.rejected.connect(Dialog.reject)
         self.buttonBox.accepted.connect(Dialog.accept)
         QMetaObject.connectSlotsByName(Dialog)
-        Dialog.setTabOrder(self.fieldList, self.AddDeadlineButton)
+        Dialog.setTabOrder(self.deadlineTable, self.AddDeadlineButton)
         Dialog.setTabOrder(self.AddDeadlineButton, self.DeleteDeadlineButton)
 
     def retranslateUi(self, Dialog):
@@ -89,7 +92,7 @@ class Ui_Dialog(object):
         self.AddDeadlineButton.setText(_translate("Dialog", "Add Deadline"))
         # self.EditDeadlineButton.setText(_translate("Dialog", "Edit Deadline"))
         self.DeleteDeadlineButton.setText(_translate("Dialog", "Delete Deadline"))
-        self.OneOrManyLabel.setText(_translate("Dialog", "Choose Pop-Up Style"))
-        self.OneOrManyBox.setItemText(0, _translate("Dialog", "Single Summary Pop Up"))
-        self.OneOrManyBox.setItemText(1, _translate("Dialog", "One Pop Up per Deck"))
+        self.BudgetLabel.setText(_translate("Dialog", "Daily New Card Budget"))
+        self.BudgetBox.setToolTip(_translate("Dialog", "Most new cards to study per day across all deadlines"))
+        self.BudgetBox.setSpecialValueText(_translate("Dialog", "No limit"))
         self.ProcessDeadlineBox.setText(_translate("Dialog", "Process Deadlines"))
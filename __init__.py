@@ -9,250 +9,490 @@
 
 from __future__ import division
 
-import datetime
-import math
 import time
 
-from anki.hooks import addHook, wrap
-from anki.utils import intTime
-from aqt import *
-from aqt.main import AnkiQt
-from aqt.utils import (askUser, getOnlyText, openHelp, openLink, showInfo,
-                       showWarning)
+# Measured from here to the end of the module, see showDiagnostics
+_import_started = time.perf_counter()
 
-from .config import DeadlineDialog
+import os
 
-deadlines = mw.addonManager.getConfig(__name__)
+from aqt import gui_hooks, mw
+from aqt.operations import QueryOp
+from aqt.qt import QAction, QMenu, QTimer
+from aqt.utils import showInfo, showText, showWarning, tooltip
 
-mw.addonManager.setConfigAction(__name__, DeadlineDialog)
+# cards_per_day and days_until_deadline used to live here and stay importable
+from . import api
+from .core import (active_deadlines, cards_per_day,  # noqa: F401
+                   days_until_deadline, seconds_until_rollover)
+from .counting import FirstSeenCache
+from .deckindex import DeckIndex
+from .diagnostics import NO_STATS, RunStats, append_log
+from .live import LiveCounts
+from .processing import ProcessingCancelled, compute_deadlines, deck_groups
+from .snapshot import Snapshot
+from .store import DeadlineStore, deck_deadlines, sync_profile
+from .writeback import LimitWriter
+
+# The add-on config, kept in memory; writes are batched per user action
+deadline_store = DeadlineStore(
+    lambda: mw.addonManager.getConfig(__name__),
+    lambda config: mw.addonManager.writeConfig(__name__, config),
+)
+
+
+# Open the Configure Deadlines dialog
+def openDeadlineDialog():
+    # The dialog and its forms are only imported the first time it is opened
+    from .config import DeadlineDialog
+
+    runProfiled("Configure Deadlines", DeadlineDialog)
+
+
+mw.addonManager.setConfigAction(__name__, openDeadlineDialog)
+mw.addonManager.setConfigUpdatedAction(__name__, deadline_store.reload)
 
 DeadlineMenu = QMenu("Deadline", mw)
 mw.form.menuTools.addMenu(DeadlineMenu)
 
 
-# Count new cards in a deck
-def new_cards_in_deck(deck_id):
-    return mw.col.db.scalar(
-        """
-        SELECT count() FROM cards 
-        WHERE type = 0 
-        AND queue != -1 
-        AND did = ?
-        AND queue != -2""",
-        deck_id,
-    )  # Exclude suspended cards
-
-
-# Find settings group ID
-def find_settings_group_id(name):
-    dconf = mw.col.decks.all_config()
-    for k in dconf:
-        if k["name"] == name:
-            return k["id"]
-            # All I want is the group ID
-    return False
-
-
-# Find decks using a specific config
-def find_decks_in_settings_group(config_id):
-    decks = []
-    for deck in mw.col.decks.all():
-        if deck.get("conf_id") == config_id:
-            decks.append(deck["id"])
-    return decks
-
-
-# Count new cards in settings group
-def new_cards_in_settings_group(name):
-    new_cards = 0
-    new_today = 0
-
-    # Get config id for the deck name
-    deck_id = mw.col.decks.id_for_name(name)
-    deck = mw.col.decks.get(deck_id)
-    config_id = deck.get("conf_id")
-
-    if config_id:
-        # Find all decks using this config
-        decks = find_decks_in_settings_group(config_id)
-        for d in decks:
-            new_cards += new_cards_in_deck(d)
-            new_today += first_seen_cards_in_deck(d)
-    return new_cards, new_today
-
-
-# Count cards first seen today
-def first_seen_cards_in_deck(deck_id):
-    day_cutoff = mw.col.sched.day_cutoff
-    return (
-        mw.col.db.scalar(
-            """
-        SELECT count() FROM (
-            SELECT r.id as review, c.id as card, c.did as deck
-            FROM revlog r, cards c
-            WHERE r.cid = c.id
-            AND r.type = 0
-            AND r.id >= ?
-            AND deck = ?
-            GROUP BY c.id
-        )""",
-            day_cutoff * 1000,
-            deck_id,
+# Deck and options group lookups, rebuilt after deck or options group changes
+deck_index = DeckIndex()
+# Remaining counts of the last run, kept current by card events
+live_counts = LiveCounts()
+# Cards first seen today per deck, topped up from the revlog on each run
+first_seen_cache = FirstSeenCache()
+
+
+def loadDeadlines():
+    """The deadline config, read from disk and migrated once per session"""
+    return deadline_store.load()
+
+
+def profileEntries():
+    """The current profile's deadlines, keyed by deck id with current deck names"""
+    entries = deadline_store.profile(str(mw.pm.name))
+    if sync_profile(entries, deck_index.get(mw.col)):
+        deadline_store.save()
+    return entries
+
+
+def profileDeadlines():
+    """Active (deck id, deck name, days_left) for the current profile"""
+    include_today = True
+    return active_deadlines(
+        deck_deadlines(profileEntries(), deck_index.get(mw.col)), include_today
+    )
+
+
+def userFile(name):
+    """Path of a file in the add-on's user_files folder, which survives updates"""
+    return os.path.join(mw.addonManager.addonsFolder(__name__), "user_files", name)
+
+
+def profileSnapshot():
+    """Snapshot of the inputs the current profile's deadlines were last counted from"""
+    return Snapshot(userFile("snapshot.json"), str(mw.pm.name))
+
+
+# Timings of the most recent run, shown by Deadline > Diagnostics
+last_run_stats = None
+
+
+def runStats(silent, label=None):
+    return RunStats(label or ("Profile load" if silent else "Process Deadlines"))
+
+
+def finishRun(stats):
+    """Keep the run's timings for the Diagnostics window and log them"""
+    global last_run_stats
+    last_run_stats = stats
+    record = stats.as_dict()
+    record["importSeconds"] = import_seconds
+    append_log(userFile("diagnostics.jsonl"), record)
+
+
+def allDeadlines(silent=True, label=None):
+    """Process all deadlines and update deck configurations"""
+    stats = runStats(silent, label)
+    with stats.phase("load config"):
+        deadlines = loadDeadlines()
+        snapshot = profileSnapshot()
+    results = compute_deadlines(
+        mw.col,
+        deck_index,
+        profileDeadlines(),
+        mw.col.sched.day_cutoff,
+        snapshot=snapshot,
+        first_seen=first_seen_cache,
+        stats=stats,
+        budget=deadlines.get("dailyBudget"),
+    )
+    with stats.phase("save snapshot"):
+        snapshot.save()
+    applyDeadlineResults(results, silent, stats)
+    finishRun(stats)
+
+
+def applyDeadlineResults(results, silent=True, stats=NO_STATS):
+    """Write computed limits to the collection and report them. Main thread only."""
+    index = deck_index.get(mw.col)
+    live_counts.load(
+        results,
+        deck_groups(index, [r.deck_id for r in results]),
+        loadDeadlines().get("dailyBudget"),
+    )
+
+    with stats.phase("write"):
+        writer = LimitWriter()
+        for result in results:
+            writer.set_limits(result.deck_id, result.per_day, result.review_limit)
+        written = writer.apply(mw.col)
+
+    # Save and refresh the UI once, if any limit changed
+    if written:
+        with stats.phase("save"):
+            mw.col.save()
+        with stats.phase("reset"):
+            mw.reset()
+
+    api.deadlines_computed(results)
+    api.deadline_limits_applied(results, written)
+    with stats.phase("report"):
+        reportResults(results, silent)
+
+
+# The Deadline Results window, created the first time results are shown
+results_window = None
+
+
+def resultsWindow():
+    global results_window
+    if results_window is None:
+        from .resultsview import ResultsWindow
+
+        results_window = ResultsWindow(mw)
+    return results_window
+
+
+def reportResults(results, silent):
+    """List results in the results window; silent runs only update it if open"""
+    if not silent:
+        resultsWindow().showResults(results)
+    elif results_window is not None and results_window.isVisible():
+        results_window.showResults(results)
+
+
+# The QueryOp of the background run in progress, if any
+_background_run = None
+
+# A run asked for while a background run was in progress, as runDeadlines
+# arguments; it starts once that run ends
+_queued_run = None
+
+
+def reportProgress(label, value, max):
+    """Progress callback for background runs; called off the main thread"""
+    if mw.progress.want_cancel():
+        raise ProcessingCancelled()
+    mw.taskman.run_on_main(
+        lambda: mw.progress.update(label=label, value=value, max=max)
+    )
+
+
+def allDeadlinesInBackground(silent=True, label=None):
+    """Count deadlines in a background thread, then apply the limits on the main thread"""
+    global _background_run
+    if _background_run:
+        return
+
+    deadlines = loadDeadlines()
+    active = profileDeadlines()
+    if not active and silent:
+        return
+
+    snapshot = profileSnapshot()
+    stats = runStats(silent, label)
+    budget = deadlines.get("dailyBudget")
+
+    def op(col):
+        return compute_deadlines(
+            col,
+            deck_index,
+            active,
+            col.sched.day_cutoff,
+            reportProgress,
+            snapshot,
+            first_seen_cache,
+            stats,
+            budget,
         )
-        or 0
+
+    def success(results):
+        global _background_run
+        _background_run = None
+        with stats.phase("save snapshot"):
+            snapshot.save()
+        applyDeadlineResults(results, silent, stats)
+        finishRun(stats)
+        runQueuedDeadlines()
+
+    def failure(exc):
+        global _background_run
+        _background_run = None
+        if isinstance(exc, ProcessingCancelled):
+            message = "Deadline processing cancelled"
+            tooltip(message)
+        else:
+            message = f"Deadline processing failed: {exc}"
+            showWarning(message)
+        if results_window is not None:
+            results_window.runFailed(message)
+        runQueuedDeadlines()
+
+    _background_run = (
+        QueryOp(parent=mw, op=op, success=success)
+        .failure(failure)
+        .with_progress("Processing deadlines...")
     )
+    _background_run.run_in_background()
 
 
-# find days until deadline
-def days_until_deadline(deadline_date, include_today=True):
-    if not deadline_date:
-        # No deadline date
-        return False
-    date_format = "%Y-%m-%d"
-    today = datetime.datetime.today()
-    deadline_date = datetime.datetime.strptime(deadline_date, date_format)
-    delta = deadline_date - today
-    if include_today:
-        days_left = delta.days + 1  # includes today
-    else:
-        days_left = delta.days  # today not included
-    if days_left < 1:
-        days_left = 0
-    return days_left
+# Wait this long after the profile opens before processing, so the main
+# window is drawn first
+STARTUP_DELAY_MS = 1000
+
 
+def profileLoaded():
+    mw.progress.single_shot(STARTUP_DELAY_MS, startupDeadlines)
 
-# calculate cards per day
-def cards_per_day(new_cards, days_left):
-    if new_cards % days_left == 0:
-        per_day = int(new_cards / days_left)
+
+def startupDeadlines():
+    runDeadlines()
+    scheduleRollover()
+
+
+# Manual Version
+def manualDeadlines():
+    runDeadlines(False)
+
+
+def runDeadlines(silent=True, label=None, fresh=False):
+    """Process all deadlines, in the background unless the config says otherwise.
+
+    fresh forgets the live counts as the run starts, eg once they belong to
+    the previous day. A run asked for while a background run is in progress
+    is queued until it ends; requests queued meanwhile are merged into one.
+    """
+    global _queued_run
+    if not silent:
+        resultsWindow().startRun()
+    if _background_run:
+        if _queued_run:
+            silent = silent and _queued_run[0]
+            fresh = fresh or _queued_run[2]
+        _queued_run = (silent, label, fresh)
+        return
+    if fresh:
+        live_counts.invalidate()
+    if profileAction.isChecked():
+        # Profiling only sees the calling thread, so run in the foreground
+        runProfiled(label or runStats(silent).label, allDeadlines, silent, label)
+    elif loadDeadlines().get("backgroundProcessing", True):
+        allDeadlinesInBackground(silent, label)
     else:
-        per_day = int(new_cards / days_left) + 1
-    # sanity check
-    if per_day < 0:
-        per_day = 0
-    return per_day
-
-
-def update_new_cards_per_day(name, per_day):
-    """Update deck-specific new cards and review limits"""
-    # Get deck ID from name
-    deck_id = mw.col.decks.id_for_name(name)
-    if not deck_id:
+        allDeadlines(silent, label)
+
+
+def runQueuedDeadlines():
+    """Start the run queued while the last background run was in progress"""
+    global _queued_run
+    queued, _queued_run = _queued_run, None
+    if queued and mw.col is not None:
+        runDeadlines(*queued)
+
+
+# Wait this long past the day cutoff before reprocessing, so the scheduler
+# has certainly moved on to the new day
+ROLLOVER_MARGIN_MS = 5000
+
+# Fires at the next day cutoff while a profile is open
+rolloverTimer = QTimer(mw)
+rolloverTimer.setSingleShot(True)
+
+
+def scheduleRollover():
+    """Reprocess deadlines when the next day starts, if Anki is still open"""
+    seconds = seconds_until_rollover(mw.col.sched.day_cutoff, time.time())
+    rolloverTimer.start(int(seconds * 1000) + ROLLOVER_MARGIN_MS)
+
+
+def dayRollover():
+    if mw.col is None:
         return
+    runDeadlines(True, "Day rollover", fresh=True)
+    scheduleRollover()
+
+
+rolloverTimer.timeout.connect(dayRollover)
 
-    # Get the deck
-    deck = mw.col.decks.get(deck_id)
-    if not deck:
+
+def writeLiveLimits(results):
+    """Write the limits of deadlines changed by card events, without a refresh"""
+    if not results:
         return
+    writer = LimitWriter()
+    for result in results:
+        writer.set_limits(result.deck_id, result.per_day, result.review_limit)
+    api.deadline_limits_applied(results, writer.apply(mw.col))
+    reportResults(results, True)
 
-    # Update both the new cards per day limit and review limit
-    deck["newLimit"] = int(per_day)  # Set the deck-specific override
-    deck["reviewLimit"] = int(per_day * 10)  # Set review limit
 
-    # Save deck changes
-    mw.col.decks.save(deck)
+def cardAnswered(reviewer, card, ease):
+    if card.reps == 1:
+        # First review of a new card
+        live_counts.card_seen(card.did)
 
-    # Also update the config for consistency
-    config_id = deck.get("conf_id")
-    if config_id:
-        config = mw.col.decks.get_config(config_id)
-        if config:
-            config["new"]["perDay"] = int(per_day)
-            mw.col.decks.update_config(config)
 
-    # Ensure changes are saved
-    mw.col.save()
-    mw.reset()
+def noteAdded(note):
+    if loadDeadlines().get("dailyBudget"):
+        # Sharing a budget changes every deadline's share; recount instead
+        refreshTimer.start()
+        return
+    writeLiveLimits(live_counts.cards_added([card.did for card in note.cards()]))
 
 
-def calc_new_cards_per_day(name, days_left, silent=True):
-    """Calculate and update the number of new cards per day"""
-    new_cards, new_today = new_cards_in_settings_group(name)
-    total_cards = new_cards + new_today
+# Wait this long after the last browser edit before recounting
+REFRESH_DELAY_MS = 1000
 
-    if days_left <= 0:
-        per_day = total_cards  # Show all remaining cards if past deadline
-    else:
-        per_day = cards_per_day(total_cards, days_left)
+# Recounts deadlines after cards are suspended, deleted or moved
+refreshTimer = QTimer(mw)
+refreshTimer.setSingleShot(True)
+refreshTimer.setInterval(REFRESH_DELAY_MS)
 
-    # Update deck configuration
-    update_new_cards_per_day(name, per_day)
 
-    return (name, new_today, new_cards, days_left, per_day)
+def refreshDeadlines():
+    if mw.col is not None:
+        runDeadlines(True, "Card changes")
 
 
-def allDeadlines(silent=True):
-    """Process all deadlines and update deck configurations"""
-    deadlines = mw.addonManager.getConfig(__name__)
-    deadlines.pop("test", None)
+refreshTimer.timeout.connect(refreshDeadlines)
 
-    if "deadlines" not in deadlines:
-        temp = {"deadlines": {}}
-        for profile, profile_deadlines in deadlines.items():
-            temp["deadlines"][profile] = profile_deadlines
-        deadlines = temp
-        mw.addonManager.writeConfig(__name__, deadlines)
 
-    profile = str(aqt.mw.pm.name)
-    include_today = True
-    tempLogString = ""
-
-    if profile in deadlines["deadlines"]:
-        for deck, date in deadlines["deadlines"].get(profile).items():
-            days_left = days_until_deadline(date, include_today)
-            if days_left is not False:
-                (name, new_today, new_cards, days_left, per_day) = (
-                    calc_new_cards_per_day(deck, days_left, silent)
-                )
-                if deadlines.get("oneOrMany", "") == "Many":
-                    if not silent:
-                        logString = f"{name}\n\nNew cards seen today: {new_today}\nNew cards remaining: {new_cards}\nDays left: {days_left}\nNew cards per day: {per_day}"
-                        utils.showInfo(logString)
-                else:
-                    tempLogString += f"{name}\nNew cards seen today: {new_today}\nNew cards remaining: {new_cards}\nDays left: {days_left}\nNew cards per day: {per_day}\n\n"
-
-    if deadlines.get("oneOrMany", "One") == "One" and not silent:
-        summaryPopup(tempLogString)
-
-    # Make sure all changes are saved and refresh UI
-    mw.col.save()
-    mw.reset()
+def followedCardEvent(handler):
+    """True for answers and added notes, which cardAnswered and noteAdded count"""
+    from aqt.addcards import AddCards
 
+    return handler is mw.reviewer or isinstance(handler, AddCards)
 
-# Manual Version
-def manualDeadlines():
-    allDeadlines(False)
+
+def cardsChanged(changes, handler):
+    """Queue a recount after other card edits.
+
+    Answers and added notes are already counted by cardAnswered and
+    noteAdded. Anything else, eg suspending or deleting cards in the browser,
+    says which cards changed only through their modification time, so the
+    snapshot finds the deadlines to recount.
+    """
+    if not changes.card or not live_counts.results:
+        return
+    if followedCardEvent(handler):
+        return
+    refreshTimer.start()
 
 
-def summaryPopup(text):
-    parent = aqt.mw.app.activeWindow() or aqt.mw
-    popup = QDialog(parent)
-    popup.resize(500, 500)
-    layout = QVBoxLayout()
-    scroll = QScrollArea()
-    textbox = QLabel(text)
-    scroll.setWidget(textbox)
-    scroll.ensureWidgetVisible(textbox)
-    layout.addWidget(scroll)
-    okButton = QDialogButtonBox.StandardButton.Ok
-    buttonBox = QDialogButtonBox(okButton)
-    buttonBox.button(okButton).clicked.connect(closeSummary)
-    layout.addWidget(buttonBox)
-    popup.setLayout(layout)
-    popup.show()
+def profileClosing():
+    global _queued_run
+    _queued_run = None
+    rolloverTimer.stop()
+    refreshTimer.stop()
+    live_counts.invalidate()
 
 
-def closeSummary():
-    aqt.mw.app.activeWindow().close()
+def showDiagnostics():
+    startup = f"Add-on import: {import_seconds * 1000:.1f} ms"
+    if last_profile:
+        startup += f"\nLast profile: {last_profile}"
+    if last_run_stats is None:
+        showInfo(startup + "\n\nNo deadline run has been recorded since Anki started.")
+        return
+    showText(
+        startup
+        + "\n\n"
+        + last_run_stats.summary()
+        + "\n\nEarlier runs are logged to "
+        + userFile("diagnostics.jsonl"),
+        title="Deadline Diagnostics",
+    )
 
 
 manualDeadlineAction = QAction("Process Deadlines", mw)
 manualDeadlineAction.triggered.connect(manualDeadlines)
 configAction = QAction("Configure Deadlines", mw)
-configAction.triggered.connect(DeadlineDialog)
+configAction.triggered.connect(openDeadlineDialog)
 DeadlineMenu.addAction(configAction)
 DeadlineMenu.addAction(manualDeadlineAction)
-
-# Add hook to adjust Deadlines on load profile
-addHook("profileLoaded", allDeadlines)
-
+diagnosticsAction = QAction("Diagnostics", mw)
+diagnosticsAction.triggered.connect(showDiagnostics)
+DeadlineMenu.addAction(diagnosticsAction)
+profileAction = QAction("Profile Next Run", mw)
+profileAction.setCheckable(True)
+DeadlineMenu.addAction(profileAction)
+
+# Summary file of the latest profile capture, shown in the diagnostics
+last_profile = None
+
+
+def runProfiled(label, func, *args):
+    """Call func, profiling it if "Profile Next Run" is checked"""
+    global last_profile
+    if not profileAction.isChecked():
+        return func(*args)
+    profileAction.setChecked(False)
+    from .profiling import capture
+
+    with capture(label, userFile("profiles")) as result:
+        value = func(*args)
+    last_profile = result.summary_path
+    tooltip(f"Profile saved to {result.summary_path}")
+    return value
+
+
+def invalidateDeckIndex(changes, handler):
+    if changes.deck or changes.deck_config:
+        deck_index.invalidate()
+    if changes.deck or changes.note or (changes.card and not followedCardEvent(handler)):
+        # Cards moved (Change Deck reports card changes) or deleted; recount
+        # first-seen cards from the revlog
+        first_seen_cache.invalidate()
+
+
+def syncFinished():
+    """Recount after a sync.
+
+    Synced decks and reviews come from other devices; learning reviews
+    logged there earlier today have ids below the first-seen cache's
+    newest, so it starts over instead of reading on from there.
+    """
+    deck_index.invalidate()
+    first_seen_cache.invalidate()
+    if mw.col is not None:
+        runDeadlines(True, "Sync")
+
+
+# Adjust deadlines once a profile is open
+gui_hooks.profile_did_open.append(profileLoaded)
+# Keep the deck index in step with deck and options group edits
+gui_hooks.operation_did_execute.append(invalidateDeckIndex)
+gui_hooks.profile_will_close.append(deck_index.invalidate)
+gui_hooks.profile_will_close.append(first_seen_cache.invalidate)
+gui_hooks.state_did_undo.append(first_seen_cache.invalidate)
+gui_hooks.sync_did_finish.append(syncFinished)
+# Follow card events between runs, and reprocess at the day cutoff
+gui_hooks.reviewer_did_answer_card.append(cardAnswered)
+gui_hooks.add_cards_did_add_note.append(noteAdded)
+gui_hooks.operation_did_execute.append(cardsChanged)
+gui_hooks.profile_will_close.append(profileClosing)
+
+# Time spent importing the add-on, shown in the diagnostics
+import_seconds = time.perf_counter() - _import_started
@@ -0,0 +1,80 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Read-only access to the latest deadline results for other
+#              add-ons, and hooks fired when they change. Results are served
+#              from memory; nothing here queries or writes the collection.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+#
+# Usage from another add-on:
+#   deadline = __import__("723639202").api   # the add-on's folder name
+#   for result in deadline.deadlines():
+#       print(result.name, result.new_cards, result.days_left, result.per_day)
+#   deadline.deadline_limits_applied.append(my_callback)
+
+import traceback
+
+class Hook:
+    """Callbacks run in the order they were added, like Anki's gui_hooks.
+
+    A callback that raises is reported and dropped, so another add-on's bug
+    cannot stop deadlines from being applied.
+    """
+
+    def __init__(self):
+        self._hooks = []
+
+    def append(self, callback):
+        self._hooks.append(callback)
+
+    def remove(self, callback):
+        if callback in self._hooks:
+            self._hooks.remove(callback)
+
+    def count(self):
+        return len(self._hooks)
+
+    def __call__(self, *args):
+        for hook in list(self._hooks):
+            try:
+                hook(*args)
+            except Exception:
+                # Anki shows tracebacks written to stderr in its error window
+                traceback.print_exc()
+                self._hooks.remove(hook)
+
+
+# deadlines_computed(results): a run has counted and paced every deadline and
+# written their limits. results is a list of core.Pacing, in the order of the
+# config.
+deadlines_computed = Hook()
+
+# deadline_limits_applied(results, written): limits for these deadlines were
+# written; written is the number of decks and options groups that changed.
+deadline_limits_applied = Hook()
+
+
+def _live():
+    from . import live_counts
+
+    return live_counts
+
+
+def deadlines():
+    """The latest core.Pacing of every deadline; empty before the first run"""
+    return list(_live().results.values())
+
+
+def deadline(deck):
+    """The latest core.Pacing of the deadline on a deck, given by id or name, or None"""
+    results = _live().results
+    if deck in results:
+        return results[deck]
+    for result in results.values():
+        if result.name == deck:
+            return result
+    return None
+
+
+def last_computed():
+    """When the cached results were computed, as a timestamp, or None"""
+    return _live().computed_at
@@ -0,0 +1,179 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Assigning deadlines to decks and removing them again. Kept free
+#              of UI code so the dialog, benchmarks and other callers share
+#              one implementation.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+# Key added to options groups the add-on creates, recording the group they
+# were copied from ("source") and the deadline they serve ("date")
+PRESET_TAG = "deadline2"
+
+
+def preset_tag(config):
+    """The tag of an options group created by the add-on, or None"""
+    return config.get(PRESET_TAG) if config else None
+
+
+def deadline_presets(col):
+    """Map (source group id, date) to the add-on's options group for it"""
+    presets = {}
+    for config in col.decks.all_config():
+        tag = preset_tag(config)
+        if tag:
+            presets.setdefault((tag["source"], tag["date"]), config["id"])
+    return presets
+
+
+def remove_orphan_presets(col):
+    """Delete the add-on's options groups that no deck uses any more.
+
+    Scans the decks and options groups once. Returns the number removed.
+    """
+    in_use = {deck.get("conf_id") for deck in col.decks.all()}
+    removed = 0
+    for config in col.decks.all_config():
+        if preset_tag(config) and config["id"] not in in_use:
+            col.decks.remove_config(config["id"])
+            removed += 1
+    return removed
+
+
+def deadline_targets(tree, decks, subdecks=False):
+    """The decks that get a deadline when decks are selected, as {deck id: name}.
+
+    tree is a DeckTree of the collection. Decks with children are skipped
+    unless subdecks is set, in which case every leaf deck below them gets the
+    deadline instead; all leaves are found in one walk of the tree.
+    """
+    targets = {}  # deck id -> full name, each leaf once
+    for deck in decks:
+        node = tree.node(deck)
+        if node is None:
+            continue
+        if node.children and not subdecks:
+            continue
+        for leaf in tree.leaves(deck):
+            if leaf.id is not None:
+                targets[leaf.id] = leaf.full_name
+    return targets
+
+
+def assign_deadlines(col, profile_deadlines, tree, decks, date, subdecks=False):
+    """Record a deadline for several decks in profile_deadlines, keyed by deck id.
+
+    tree, decks and subdecks pick the decks as in deadline_targets.
+    A leaf still on the default options group is moved to a copy of it, so
+    its limits can be changed independently. Copies are pooled: decks with
+    the same source group and date share one, and a deck already on a copy
+    for another date moves to the pool for the new date. Copies left unused
+    are removed.
+    Returns the number of decks moved to another options group.
+    """
+    targets = deadline_targets(tree, decks, subdecks)
+
+    moved = 0
+    left_preset = False
+    configs = {}  # options group id -> config, each read once
+    presets = None
+    for deck_id, name in targets.items():
+        # Add the deadline to the config, replacing any kept under the name
+        profile_deadlines.pop(name, None)
+        profile_deadlines[str(deck_id)] = {"name": name, "date": date}
+
+        deck_obj = col.decks.get(deck_id, default=False)
+        if not deck_obj:
+            continue
+        conf_id = deck_obj.get("conf_id", 1)
+        if conf_id not in configs:
+            configs[conf_id] = col.decks.get_config(conf_id)
+        tag = preset_tag(configs[conf_id])
+        if tag:
+            if tag["date"] == date:
+                continue
+            source_id = tag["source"]
+        elif conf_id == 1:
+            # Only move decks off the default; other groups are the user's own
+            source_id = 1
+        else:
+            continue
+
+        if presets is None:
+            presets = deadline_presets(col)
+        target = presets.get((source_id, date))
+        if target is None:
+            # Copy the source group's current settings
+            if source_id not in configs:
+                configs[source_id] = col.decks.get_config(source_id)
+            source = configs[source_id] or col.decks.get_config(1)
+            template = dict(source)
+            template[PRESET_TAG] = {"source": source_id, "date": date}
+            target = col.decks.add_config_returning_id(
+                f"Deadline {date} ({source['name']})", template
+            )
+            presets[source_id, date] = target
+        deck_obj["conf_id"] = target
+        col.decks.save(deck_obj)
+        moved += 1
+        left_preset = left_preset or bool(tag)
+    if left_preset:
+        remove_orphan_presets(col)
+    return moved
+
+
+def remove_deadlines(col, profile_deadlines, keys):
+    """Drop several deadlines and clear their decks' limit overrides.
+
+    keys are the deadlines' keys in profile_deadlines: deck ids as strings,
+    or deck names for deadlines not converted yet (see store.sync_profile).
+
+    Decks on an options group created by assign_deadlines go back to the
+    group it was copied from, and copies no deck uses any more are removed.
+    Only decks that actually change are saved.
+    Returns (deadlines removed, decks moved to another options group).
+    """
+    removed = 0
+    moved = 0
+    configs = {}  # options group id -> config, each read once
+    for key in keys:
+        entry = profile_deadlines.pop(key, None)
+        if entry is None:
+            continue
+        removed += 1
+
+        # Get the deck
+        if isinstance(entry, str):
+            deck_id = col.decks.id_for_name(key)
+        else:
+            deck_id = int(key)
+        if not deck_id:
+            continue
+        deck_obj = col.decks.get(deck_id, default=False)
+        if not deck_obj:
+            continue
+        changed = False
+        if (
+            deck_obj.get("newLimit") is not None
+            or deck_obj.get("reviewLimit") is not None
+        ):
+            # Remove the deck-specific overrides
+            deck_obj["newLimit"] = None
+            deck_obj["reviewLimit"] = None
+            changed = True
+        conf_id = deck_obj.get("conf_id", 1)
+        if conf_id not in configs:
+            configs[conf_id] = col.decks.get_config(conf_id)
+        tag = preset_tag(configs[conf_id])
+        if tag:
+            # Restore the options group the deck had before its deadline
+            source_id = tag["source"]
+            if source_id not in configs:
+                configs[source_id] = col.decks.get_config(source_id)
+            deck_obj["conf_id"] = source_id if configs[source_id] else 1
+            changed = True
+            moved += 1
+        if changed:
+            col.decks.save(deck_obj)
+    if moved:
+        remove_orphan_presets(col)
+    return removed, moved
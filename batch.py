@@ -0,0 +1,179 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Headless batch processing. Opens each profile's collection
+#              directly with the anki library (no Anki window needed),
+#              computes its deadline limits and optionally writes them,
+#              spreading profiles across a process pool.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+#
+# Usage (Anki must be closed, or at least not have these profiles open):
+#   python batch.py                      # report every configured profile
+#   python batch.py --apply --jobs 8     # write the limits, 8 processes
+#   python batch.py --profile "User 1" --base ~/.local/share/Anki2
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PACKAGE = "deadline2_batch"
+
+
+def _load(module):
+    """Import one of the add-on's UI-free modules without running __init__,
+    which needs a running Anki window"""
+    if PACKAGE not in sys.modules:
+        pkg = types.ModuleType(PACKAGE)
+        pkg.__path__ = [ROOT]
+        sys.modules[PACKAGE] = pkg
+    return importlib.import_module(f"{PACKAGE}.{module}")
+
+
+def default_base():
+    """Anki's default data folder for this platform"""
+    if sys.platform.startswith("win"):
+        return os.path.join(os.environ.get("APPDATA", ""), "Anki2")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Application Support/Anki2")
+    return os.path.expanduser("~/.local/share/Anki2")
+
+
+def read_deadlines(path=None):
+    """Read the deadline config Anki saved for this add-on.
+
+    Anki keeps the user's config in meta.json; config.json only holds the
+    defaults shipped with the add-on.
+    """
+    if path is None:
+        path = os.path.join(ROOT, "meta.json")
+        if not os.path.exists(path):
+            path = os.path.join(ROOT, "config.json")
+    with open(path, encoding="utf8") as f:
+        deadlines = json.load(f)
+    if os.path.basename(path) == "meta.json":
+        deadlines = deadlines.get("config", {})
+    _load("store").migrate(deadlines)
+    return deadlines
+
+
+def process_profile(job):
+    """Compute (and with apply, write) one profile's limits. Runs in a worker."""
+    profile, path, profile_deadlines, budget, apply = job
+    from anki.collection import Collection
+
+    core = _load("core")
+    processing = _load("processing")
+    deckindex = _load("deckindex")
+    store = _load("store")
+    writeback = _load("writeback")
+
+    col = Collection(path)
+    try:
+        index = deckindex.DeckIndex()
+        # Name-keyed deadlines are converted in memory only; Anki saves the
+        # converted config the next time the profile is opened
+        store.sync_profile(profile_deadlines, index.get(col))
+        results = processing.compute_deadlines(
+            col,
+            index,
+            core.active_deadlines(
+                store.deck_deadlines(profile_deadlines, index.get(col))
+            ),
+            col.sched.day_cutoff,
+            budget=budget,
+        )
+        written = 0
+        if apply:
+            writer = writeback.LimitWriter()
+            for result in results:
+                writer.set_limits(result.deck_id, result.per_day, result.review_limit)
+            written = writer.apply(col)
+    finally:
+        col.close()
+    # Plain tuples, so the parent process can unpickle them
+    return {
+        "profile": profile,
+        "results": [tuple(r) for r in results],
+        "written": written,
+    }
+
+
+def jobs_for(deadlines, base, profiles, apply):
+    jobs = []
+    skipped = []
+    for profile, profile_deadlines in deadlines["deadlines"].items():
+        if profiles and profile not in profiles:
+            continue
+        path = os.path.join(base, profile, "collection.anki2")
+        if not profile_deadlines or not os.path.exists(path):
+            skipped.append(profile)
+            continue
+        jobs.append(
+            (profile, path, profile_deadlines, deadlines.get("dailyBudget"), apply)
+        )
+    return jobs, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compute Deadline2 limits for many profiles without the Anki UI."
+    )
+    parser.add_argument("--base", default=default_base(), help="Anki data folder")
+    parser.add_argument(
+        "--config", help="add-on meta.json or config.json (default: next to this file)"
+    )
+    parser.add_argument(
+        "--profile", action="append", help="only this profile; may be repeated"
+    )
+    parser.add_argument("--apply", action="store_true", help="write the new limits")
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count(), help="worker processes"
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    deadlines = read_deadlines(args.config)
+    jobs, skipped = jobs_for(deadlines, args.base, args.profile, args.apply)
+
+    reports = []
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(jobs) or 1))) as pool:
+        futures = [(job[0], pool.submit(process_profile, job)) for job in jobs]
+        for profile, future in futures:
+            try:
+                reports.append(future.result())
+            except Exception as exc:
+                failed += 1
+                reports.append({"profile": profile, "error": str(exc)})
+
+    if args.json:
+        print(json.dumps({"profiles": reports, "skipped": skipped}, indent=2))
+    else:
+        for report in reports:
+            if "error" in report:
+                print(f"{report['profile']}: failed: {report['error']}")
+                continue
+            print(f"{report['profile']} ({report['written']} changes written)")
+            for (name, new_today, new_cards, days_left, per_day,
+                 review_limit, peak_day, peak_load, shortfall, *_) in report["results"]:
+                # Deadlines following another on their options group have no forecast
+                peak = ""
+                if peak_day is not None:
+                    peak = f" (peak {peak_load} in {peak_day} days)"
+                print(
+                    f"  {name}: {new_cards} remaining, {new_today} seen today, "
+                    f"{days_left} days left, {per_day} per day, "
+                    f"{review_limit} reviews per day{peak}"
+                    + (f", {shortfall} cards over budget" if shortfall else "")
+                )
+        for profile in skipped:
+            print(f"{profile}: skipped (no deadlines or no collection)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
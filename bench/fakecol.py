@@ -0,0 +1,188 @@
+"""A lightweight stand-in for Anki's collection, for benchmarks.
+
+FakeCollection exposes the parts of `mw.col` the add-on uses: `db` over an
+in-memory SQLite database with Anki's `cards` and `revlog` schema, a
+`decks` manager holding plain deck and options group dicts, and
+`sched.day_cutoff` (when the next day starts, as in Anki) and `sched.today`.
+"""
+
+import copy
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE cards (
+    id integer PRIMARY KEY,
+    nid integer NOT NULL,
+    did integer NOT NULL,
+    ord integer NOT NULL,
+    mod integer NOT NULL,
+    usn integer NOT NULL,
+    type integer NOT NULL,
+    queue integer NOT NULL,
+    due integer NOT NULL,
+    ivl integer NOT NULL,
+    factor integer NOT NULL,
+    reps integer NOT NULL,
+    lapses integer NOT NULL,
+    left integer NOT NULL,
+    odue integer NOT NULL,
+    odid integer NOT NULL,
+    flags integer NOT NULL,
+    data text NOT NULL
+);
+CREATE TABLE revlog (
+    id integer PRIMARY KEY,
+    cid integer NOT NULL,
+    usn integer NOT NULL,
+    ease integer NOT NULL,
+    ivl integer NOT NULL,
+    lastIvl integer NOT NULL,
+    factor integer NOT NULL,
+    time integer NOT NULL,
+    type integer NOT NULL
+);
+CREATE INDEX ix_cards_nid ON cards (nid);
+CREATE INDEX ix_cards_sched ON cards (did, queue, due);
+CREATE INDEX ix_cards_usn ON cards (usn);
+CREATE INDEX ix_revlog_cid ON revlog (cid);
+CREATE INDEX ix_revlog_usn ON revlog (usn);
+"""
+
+DEFAULT_CONFIG = {
+    "id": 1,
+    "name": "Default",
+    "new": {"perDay": 20},
+    "rev": {"perDay": 200},
+}
+
+
+class FakeDB:
+    """The subset of anki.dbproxy.DBProxy used by the add-on"""
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.executescript(SCHEMA)
+        self.statements = 0
+
+    def _run(self, sql, args):
+        self.statements += 1
+        return self.conn.execute(sql, args)
+
+    def scalar(self, sql, *args):
+        row = self._run(sql, args).fetchone()
+        return row[0] if row else None
+
+    def all(self, sql, *args):
+        return self._run(sql, args).fetchall()
+
+    def list(self, sql, *args):
+        return [row[0] for row in self._run(sql, args)]
+
+    def first(self, sql, *args):
+        return self._run(sql, args).fetchone()
+
+    def execute(self, sql, *args):
+        return self._run(sql, args).fetchall()
+
+    def executemany(self, sql, rows):
+        self.statements += 1
+        self.conn.executemany(sql, rows)
+
+
+class FakeDecks:
+    """The subset of anki.decks.DeckManager used by the add-on"""
+
+    def __init__(self):
+        self.decks = {}  # id -> deck dict
+        self.configs = {1: copy.deepcopy(DEFAULT_CONFIG)}
+        self._names = {}  # name -> id
+        self.saves = 0
+
+    def add(self, name, conf_id=1):
+        did = len(self.decks) + 1
+        self.decks[did] = {
+            "id": did,
+            "name": name,
+            "conf_id": conf_id,
+            "dyn": 0,
+            "newLimit": None,
+            "reviewLimit": None,
+        }
+        self._names[name] = did
+        return did
+
+    def all(self):
+        # Anki builds a fresh dict per deck, so copy to keep costs comparable
+        return [copy.deepcopy(d) for d in self.decks.values()]
+
+    def all_names(self):
+        return list(self._names)
+
+    def all_names_and_ids(self):
+        return [DeckNameId(d["name"], did) for did, d in self.decks.items()]
+
+    def get(self, did, default=True):
+        deck = self.decks.get(did)
+        if deck is None:
+            return copy.deepcopy(self.decks[1]) if default else None
+        return copy.deepcopy(deck)
+
+    def id_for_name(self, name):
+        return self._names.get(name)
+
+    def name(self, did):
+        return self.decks[did]["name"]
+
+    def child_ids(self, parent_name):
+        prefix = parent_name + "::"
+        return (did for name, did in self._names.items() if name.startswith(prefix))
+
+    def save(self, deck):
+        self.saves += 1
+        self.decks[deck["id"]] = copy.deepcopy(deck)
+
+    def all_config(self):
+        return [copy.deepcopy(c) for c in self.configs.values()]
+
+    def get_config(self, conf_id):
+        conf = self.configs.get(conf_id)
+        return copy.deepcopy(conf) if conf else None
+
+    def update_config(self, conf):
+        self.saves += 1
+        self.configs[conf["id"]] = copy.deepcopy(conf)
+
+    def add_config_returning_id(self, name, clone_from=None):
+        conf = copy.deepcopy(clone_from or DEFAULT_CONFIG)
+        conf["id"] = max(self.configs) + 1
+        conf["name"] = name
+        self.configs[conf["id"]] = conf
+        return conf["id"]
+
+    def remove_config(self, conf_id):
+        self.configs.pop(conf_id, None)
+
+
+class DeckNameId:
+    def __init__(self, name, id):
+        self.name = name
+        self.id = id
+
+
+class FakeSched:
+    # Days since the collection was created, as used by review due numbers
+    TODAY = 1000
+
+    def __init__(self, day_cutoff):
+        self.day_cutoff = day_cutoff
+        self.today = self.TODAY
+
+
+class FakeCollection:
+    def __init__(self, day_cutoff):
+        self.db = FakeDB()
+        self.decks = FakeDecks()
+        self.sched = FakeSched(day_cutoff)
+
+    def save(self):
+        pass
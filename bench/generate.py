@@ -0,0 +1,111 @@
+"""Generate synthetic collections of configurable size for benchmarks."""
+
+import datetime
+import random
+
+from fakecol import FakeCollection, FakeSched
+
+DAY = 86400
+
+# name -> (cards, decks, revlog rows, deadlines)
+PRESETS = {
+    "tiny": (2_000, 50, 20_000, 10),
+    "small": (50_000, 500, 500_000, 50),
+    "medium": (200_000, 2_000, 2_000_000, 150),
+    "large": (500_000, 5_000, 10_000_000, 300),
+}
+
+
+def deck_names(count, rng):
+    """Deck names three levels deep, eg 'Subject 3::Unit 12::Topic 4'"""
+    names = []
+    subject = unit = 0
+    while len(names) < count:
+        subject += 1
+        names.append(f"Subject {subject}")
+        for unit in range(1, rng.randint(2, 8)):
+            names.append(f"Subject {subject}::Unit {unit}")
+            for topic in range(1, rng.randint(2, 12)):
+                names.append(f"Subject {subject}::Unit {unit}::Topic {topic}")
+    return names[:count]
+
+
+def generate(cards, decks, revlog, deadlines, seed=0, today=None):
+    """Build a FakeCollection.
+
+    Cards are spread over the decks; about 40% are new and a few are
+    suspended or buried. Revlog rows cover the last year, with some
+    learning reviews logged today. Leaf decks chosen as deadline decks get
+    their own options group, the way the add-on sets them up.
+    Returns (col, profile deadlines keyed by deck id, as the add-on stores them).
+    """
+    rng = random.Random(seed)
+    today = today or datetime.date.today()
+    # Like Anki's sched.day_cutoff, the time the next day starts
+    day_start = int(
+        datetime.datetime.combine(today, datetime.time(4)).timestamp()
+    )
+    day_cutoff = day_start + DAY
+    col = FakeCollection(day_cutoff)
+
+    names = deck_names(decks, rng)
+    deck_ids = [col.decks.add(name) for name in names]
+    parents = {name.rsplit("::", 1)[0] for name in names if "::" in name}
+    leaves = [name for name in names if name not in parents]
+
+    def card_rows():
+        for cid in range(1, cards + 1):
+            did = deck_ids[cid % len(deck_ids)]
+            roll = rng.random()
+            if roll < 0.4:
+                ctype, queue = 0, 0
+            elif roll < 0.43:
+                ctype, queue = 0, -1
+            elif roll < 0.45:
+                ctype, queue = 0, -2
+            else:
+                ctype, queue = 2, 2
+            mod = day_start - rng.randint(0, 365 * DAY)
+            if queue == 2:
+                # Review cards: some overdue, the rest spread over their interval
+                ivl = rng.randint(1, 180)
+                due = FakeSched.TODAY + rng.randint(-5, ivl)
+            else:
+                ivl, due = 0, cid
+            yield (cid, cid, did, 0, mod, 0, ctype, queue, due, ivl, 2500, 0, 0, 0, 0, 0, 0, "")
+
+    col.db.executemany(
+        "INSERT INTO cards VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", card_rows()
+    )
+
+    start_ms = (day_start - 366 * DAY) * 1000
+    today_ms = (day_start - DAY) * 1000
+    span = today_ms - start_ms
+
+    def revlog_rows():
+        rid = start_ms
+        step = max(1, span // max(revlog, 1))
+        for _ in range(revlog):
+            rid += rng.randint(1, 2 * step - 1) if step > 1 else 1
+            yield (rid, rng.randint(1, cards), 0, 3, 1, 0, 2500, 5000, rng.choice((0, 1, 1, 1, 2)))
+        # learning reviews logged since the day started
+        rid = max(rid, day_start * 1000)
+        for _ in range(max(revlog // 1000, 1)):
+            rid += rng.randint(1, 60_000)
+            yield (rid, rng.randint(1, cards), 0, 3, 0, 0, 2500, 5000, 0)
+
+    col.db.executemany("INSERT INTO revlog VALUES (?,?,?,?,?,?,?,?,?)", revlog_rows())
+    col.db.conn.commit()
+
+    chosen = rng.sample(leaves, min(deadlines, len(leaves)))
+    profile_deadlines = {}
+    for name in chosen:
+        did = col.decks.id_for_name(name)
+        deck = col.decks.get(did)
+        deck["conf_id"] = col.decks.add_config_returning_id(name, col.decks.get_config(1))
+        col.decks.save(deck)
+        date = today + datetime.timedelta(days=rng.randint(1, 120))
+        profile_deadlines[str(did)] = {"name": name, "date": date.isoformat()}
+    col.db.statements = 0
+    col.decks.saves = 0
+    return col, profile_deadlines
@@ -0,0 +1,204 @@
+"""Benchmarks for the deadline pipeline against a synthetic collection.
+
+Runs outside Anki: the add-on's UI-free modules are imported directly and
+pointed at a FakeCollection. Usage:
+
+    python bench/run.py --preset small
+    python bench/run.py --cards 500000 --decks 5000 --revlog 10000000 --deadlines 300
+
+Each scenario reports wall time, SQL statements and deck/config saves.
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate import PRESETS, generate  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "deadline2"
+
+
+def load_addon():
+    """Import the add-on package without running its __init__, which needs Anki"""
+    if PACKAGE not in sys.modules:
+        pkg = types.ModuleType(PACKAGE)
+        pkg.__path__ = [ROOT]
+        sys.modules[PACKAGE] = pkg
+    return types.SimpleNamespace(
+        assign=importlib.import_module(PACKAGE + ".assign"),
+        core=importlib.import_module(PACKAGE + ".core"),
+        counting=importlib.import_module(PACKAGE + ".counting"),
+        deckindex=importlib.import_module(PACKAGE + ".deckindex"),
+        decktree=importlib.import_module(PACKAGE + ".decktree"),
+        preview=importlib.import_module(PACKAGE + ".preview"),
+        processing=importlib.import_module(PACKAGE + ".processing"),
+        snapshot=importlib.import_module(PACKAGE + ".snapshot"),
+        store=importlib.import_module(PACKAGE + ".store"),
+        writeback=importlib.import_module(PACKAGE + ".writeback"),
+    )
+
+
+class Timer:
+    def __init__(self, col):
+        self.col = col
+        self.results = []
+
+    def measure(self, name, func, repeat=1):
+        """Run func repeat times and record the fastest run"""
+        best = None
+        for _ in range(repeat):
+            self.col.db.statements = 0
+            self.col.decks.saves = 0
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best["seconds"]:
+                best = {
+                    "scenario": name,
+                    "seconds": elapsed,
+                    "statements": self.col.db.statements,
+                    "saves": self.col.decks.saves,
+                }
+        self.results.append(best)
+        print(
+            f"{name:<40} {best['seconds'] * 1000:>10.1f} ms"
+            f" {best['statements']:>8} sql {best['saves']:>8} saves"
+        )
+
+
+def run_deadlines(addon, col, profile_deadlines, index, snapshot=None, first_seen=None):
+    """What allDeadlines does, minus the popups: count, pace and write back"""
+    active = addon.core.active_deadlines(
+        addon.store.deck_deadlines(profile_deadlines, index.get(col))
+    )
+    results = addon.processing.compute_deadlines(
+        col,
+        index,
+        active,
+        col.sched.day_cutoff,
+        snapshot=snapshot,
+        first_seen=first_seen,
+    )
+    writer = addon.writeback.LimitWriter()
+    for result in results:
+        writer.set_limits(result.deck_id, result.per_day, result.review_limit)
+    writer.apply(col)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="tiny")
+    parser.add_argument("--cards", type=int)
+    parser.add_argument("--decks", type=int)
+    parser.add_argument("--revlog", type=int)
+    parser.add_argument("--deadlines", type=int)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    cards, decks, revlog, deadlines = PRESETS[args.preset]
+    size = {
+        "cards": args.cards or cards,
+        "decks": args.decks or decks,
+        "revlog": args.revlog or revlog,
+        "deadlines": args.deadlines or deadlines,
+    }
+    addon = load_addon()
+
+    print("generating", ", ".join(f"{v} {k}" for k, v in size.items()))
+    start = time.perf_counter()
+    col, profile_deadlines = generate(seed=args.seed, **size)
+    print(f"generated in {time.perf_counter() - start:.1f}s\n")
+    timer = Timer(col)
+
+    # allDeadlines: first run of a session, nothing cached
+    timer.measure(
+        "allDeadlines (cold)",
+        lambda: run_deadlines(
+            addon, col, profile_deadlines, addon.deckindex.DeckIndex()
+        ),
+        args.repeat,
+    )
+
+    # allDeadlines: repeat runs with the deck index, snapshot and caches warm
+    with tempfile.TemporaryDirectory() as tmp:
+        index = addon.deckindex.DeckIndex()
+        snapshot = addon.snapshot.Snapshot(os.path.join(tmp, "snapshot.json"), "bench")
+        first_seen = addon.counting.FirstSeenCache()
+        run_deadlines(addon, col, profile_deadlines, index, snapshot, first_seen)
+        timer.measure(
+            "allDeadlines (warm)",
+            lambda: run_deadlines(
+                addon, col, profile_deadlines, index, snapshot, first_seen
+            ),
+            args.repeat,
+        )
+
+    # Add Deadline dialog: building the deck tree behind the picker
+    timer.measure(
+        "dialog deck tree",
+        lambda: addon.decktree.DeckTree(
+            (d.name, d.id) for d in col.decks.all_names_and_ids()
+        ),
+        args.repeat,
+    )
+
+    # applyDeadlineForDecks with "Apply to All Sub-Decks" on the biggest tree
+    subjects = [n for n in col.decks.all_names() if "::" not in n]
+    biggest = max(
+        subjects, key=lambda s: sum(1 for _ in col.decks.child_ids(s))
+    )
+    date = (datetime.date.today() + datetime.timedelta(days=30)).isoformat()
+
+    # Add Deadline preview: counts read when the window opens, then one
+    # update per calendar click or selection change
+    tree = addon.decktree.DeckTree(
+        (d.name, d.id) for d in col.decks.all_names_and_ids()
+    )
+    counts = addon.preview.DeckCounts(col, col.sched.day_cutoff)
+    index = addon.deckindex.DeckIndex().get(col)
+    active = addon.core.active_deadlines(
+        addon.store.deck_deadlines(profile_deadlines, index)
+    )
+    timer.measure(
+        "preview counts",
+        lambda: addon.preview.DeckCounts(col, col.sched.day_cutoff),
+        args.repeat,
+    )
+    timer.measure(
+        "preview update",
+        lambda: addon.preview.preview(
+            tree, counts, subjects, date, True, index=index, active=active
+        ),
+        args.repeat,
+    )
+
+    def apply_subdecks():
+        tree = addon.decktree.DeckTree(
+            (d.name, d.id) for d in col.decks.all_names_and_ids()
+        )
+        addon.assign.assign_deadlines(col, {}, tree, [biggest], date, True)
+
+    timer.measure(
+        f"applyDeadlineForDecks subdecks ({sum(1 for _ in col.decks.child_ids(biggest))})",
+        apply_subdecks,
+    )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"size": size, "results": timer.results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
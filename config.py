@@ -6,67 +6,62 @@
 #              are seen by deadline.
 # License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
 
-import datetime
-import math
-import time
-
-from anki.hooks import addHook, wrap
-from anki.utils import intTime
-from aqt import *
-from aqt.main import AnkiQt
-from aqt.qt import *
-from aqt.utils import (askUser, getOnlyText, openHelp, openLink, showInfo,
-                       showWarning)
+from aqt import mw
+from aqt.qt import QDialog
+from aqt.utils import askUser, openLink
 
 from . import CalForm, ConfigForm
+from .assign import assign_deadlines, remove_deadlines
+from .deadlinelist import DeadlineTable, deadline_rows
+from .deckpicker import DeckPicker
+from .decktree import DeckTree
+from .preview import DeckCounts, describe, preview
 
 
 class DeadlineDialog(QDialog):
     def __init__(self):
         QDialog.__init__(self, parent=mw)  # , Qt.Window)
 
-        self.mw = aqt.mw
-        self.deadlines = mw.addonManager.getConfig(__name__)
-        self.deadlines.pop("test")
+        from . import deadline_store
+
+        self.mw = mw
+        self.store = deadline_store
+        self.deadlines = deadline_store.load()
         self.form = ConfigForm.Ui_Dialog()
         self.form.setupUi(self)
-        self.setWindowTitle(_("Deadline"))
+        self.setWindowTitle("Deadline")
         self.form.ProcessDeadlineBox.clicked.connect(self.callDeadlines)
+        self.deadlineTable = DeadlineTable(self.form.deadlineTable)
         self.fillFields()
         self.setupSignals()
-        if self.deadlines.get("oneOrMany", "") == "Many":
-            self.form.OneOrManyBox.setCurrentIndex(1)
-        else:
-            self.form.OneOrManyBox.setCurrentIndex(0)
+        self.form.BudgetBox.setValue(self.deadlines.get("dailyBudget") or 0)
+        self.form.BudgetBox.editingFinished.connect(self.onBudgetChanged)
         self.resize(500, 500)
-        self.Calwindow = QDialog(self)
-        self.LayoutForCal = CalForm.Ui_Dialog()
-        self.LayoutForCal.setupUi(self.Calwindow)
-        self.LayoutForCal.pushButton.clicked.connect(self.readValues)
+        self.Calwindow = None  # built the first time Add is clicked
+        self.deckTree = None
+        self.deckCounts = None  # read each time the Add window opens
+        self.deckIndex = None
+        self.activeDeadlines = []
         self.exec()
 
     def callDeadlines(self):
         from . import manualDeadlines
 
-        tempString = str(self.form.OneOrManyBox.currentText())
-        if tempString.find("Single") != -1:
-            self.deadlines["oneOrMany"] = "One"
-        else:
-            self.deadlines["oneOrMany"] = "Many"
-        mw.addonManager.writeConfig(__name__, self.deadlines)
         manualDeadlines()
 
+    def onBudgetChanged(self):
+        budget = self.form.BudgetBox.value() or None
+        if budget != self.deadlines.get("dailyBudget"):
+            self.deadlines["dailyBudget"] = budget
+            self.store.save()
+
+    def profileEntries(self):
+        from . import profileEntries
+
+        return profileEntries()
+
     def fillFields(self):
-        self.form.fieldList.clear()
-        for user in self.deadlines["deadlines"]:
-            if user != str(aqt.mw.pm.name):
-                continue
-            for deck, deadline in self.deadlines["deadlines"].get(user).items():
-                if deadline == "":
-                    continue
-                self.form.fieldList.addItem(
-                    "user:{{{}}} deck:{{{}}} date:{{{}}}".format(user, deck, deadline)
-                )
+        self.deadlineTable.setRows(deadline_rows(mw.col, self.profileEntries()))
 
     def setupSignals(self):
         f = self.form
@@ -76,97 +71,118 @@ class DeadlineDialog(QDialog):
 
     def readValues(self):
         if self.LayoutForCal.checkBox_2.isChecked():
-            if not utils.askUser(
+            if not askUser(
                 "Are you sure you want to continue? The Apply to all Sub-Decks Box is checked"
             ):
                 return
-        user = str(aqt.mw.pm.name)
+        date = self.selectedDate()
+        self.Calwindow.close()
+        self.applyDeadlineForDecks(self.deckPicker.selectedDecks(), date)
+        self.deckPicker.clearSelection()
+        self.fillFields()
+
+    def selectedDate(self):
         year = self.LayoutForCal.calendarWidget.selectedDate().year()
         month = self.LayoutForCal.calendarWidget.selectedDate().month()
         day = self.LayoutForCal.calendarWidget.selectedDate().day()
-        date = "{}-{}-{}".format(year, str(month).zfill(2), str(day).zfill(2))
-        self.Calwindow.close()
-        if not user in self.deadlines["deadlines"]:
-            self.deadlines["deadlines"][user] = {}
-        tempString = str(self.form.OneOrManyBox.currentText())
-        if tempString.find("Single") != -1:
-            self.deadlines["oneOrMany"] = "One"
-        else:
-            self.deadlines["oneOrMany"] = "Many"
-        while self.LayoutForCal.listWidget.selectedIndexes():
-            deck = self.LayoutForCal.listWidget.item(
-                self.LayoutForCal.listWidget.selectedIndexes()[0].row()
-            ).text()
-            self.LayoutForCal.listWidget.takeItem(
-                self.LayoutForCal.listWidget.selectedIndexes()[0].row()
+        return "{}-{}-{}".format(year, str(month).zfill(2), str(day).zfill(2))
+
+    def applyDeadlineForDecks(self, decks, date):
+        # One undo step and one config write for the whole selection
+        with self.store.batch():
+            undo_pos = mw.col.add_custom_undo_entry("Add Deadline")
+            moved = assign_deadlines(
+                mw.col,
+                self.profileEntries(),
+                self.deckTreeIndex(),
+                decks,
+                date,
+                self.Calwindow is not None and self.LayoutForCal.checkBox_2.isChecked(),
             )
-            self.applyDeadlineForDeck(deck, date)
-        self.fillFields()
+            mw.col.merge_undo_entries(undo_pos)
+            if moved:
+                # Decks moved to new options groups
+                from . import deck_index
 
-    def applyDeadlineForDeck(self, deck, date):
-        user = str(aqt.mw.pm.name)
+                deck_index.invalidate()
 
-        childIds = list(mw.col.decks.child_ids(deck))
-        if childIds and not self.LayoutForCal.checkBox_2.isChecked():
-            return
-        elif childIds and self.LayoutForCal.checkBox_2.isChecked():
-            for child in childIds:
-                childName = mw.col.decks.name(child)
-                self.applyDeadlineForDeck(childName, date)
-            return
+            # Save the deadlines config
+            self.store.save()
 
-        # Get the deck ID
-        DeckIDToUpdate = mw.col.decks.id_for_name(deck)
-
-        # Add the deadline to the config
-        self.deadlines["deadlines"][user][deck] = date
-
-        # Get the current deck config
-        deck_obj = mw.col.decks.get(DeckIDToUpdate)
-        current_config_id = deck_obj.get("conf_id", 1)  # default to 1 if not found
-
-        # Only create a new config if using the default
-        if current_config_id == 1:
-            # Get the current config dict
-            current_config = mw.col.decks.get_config(current_config_id)
-            # Create new config based on current settings
-            new_config_id = mw.col.decks.add_config_returning_id(deck, current_config)
-            # Update the deck to use the new config
-            deck_obj["conf_id"] = new_config_id
-            mw.col.decks.save(deck_obj)
-
-        # Save the deadlines config
-        mw.addonManager.writeConfig(__name__, self.deadlines)
+    def deckTreeIndex(self):
+        """The deck hierarchy, built once per dialog session"""
+        if self.deckTree is None:
+            self.deckTree = DeckTree(
+                (d.name, d.id) for d in mw.col.decks.all_names_and_ids()
+            )
+        return self.deckTree
+
+    def calendarWindow(self):
+        """The Add Deadline window, built on first use"""
+        if self.Calwindow is None:
+            self.Calwindow = QDialog(self)
+            self.LayoutForCal = CalForm.Ui_Dialog()
+            self.LayoutForCal.setupUi(self.Calwindow)
+            self.LayoutForCal.pushButton.clicked.connect(self.readValues)
+            self.deckPicker = DeckPicker(
+                self.LayoutForCal.deckTree, self.LayoutForCal.searchEdit
+            )
+            self.LayoutForCal.calendarWidget.selectionChanged.connect(
+                self.updatePreview
+            )
+            self.LayoutForCal.deckTree.selectionModel().selectionChanged.connect(
+                self.updatePreview
+            )
+            self.LayoutForCal.checkBox_2.toggled.connect(self.updatePreview)
+        return self.Calwindow
 
     def onAdd(self):
-        self.Calwindow.show()
-        self.LayoutForCal.listWidget.clear()
-        for deck in sorted(aqt.mw.col.decks.all_names()):
-            self.LayoutForCal.listWidget.addItem(deck)
+        window = self.calendarWindow()
+        self.deckPicker.setTree(self.deckTreeIndex())
+        from . import deck_index, first_seen_cache, profileDeadlines
+
+        # The only collection reads of the preview; updates use these counts
+        self.deckCounts = DeckCounts(
+            mw.col, mw.col.sched.day_cutoff, first_seen_cache
+        )
+        # Decks on a shared options group are paced with the group's deadlines
+        self.deckIndex = deck_index.get(mw.col)
+        self.activeDeadlines = profileDeadlines()
+        self.updatePreview()
+        window.show()
+
+    def updatePreview(self, *args):
+        """Show the new cards per day a deadline on the selected date and decks needs"""
+        if self.deckCounts is None:
+            return
+        result = preview(
+            self.deckTreeIndex(),
+            self.deckCounts,
+            self.deckPicker.selectedDecks(),
+            self.selectedDate(),
+            self.LayoutForCal.checkBox_2.isChecked(),
+            index=self.deckIndex,
+            active=self.activeDeadlines,
+        )
+        self.LayoutForCal.previewLabel.setText(describe(result))
 
     def onDelete(self):
         """Handle deletion of deadlines"""
-        while self.form.fieldList.selectedIndexes():
-            temp = self.form.fieldList.item(
-                self.form.fieldList.selectedIndexes()[0].row()
-            ).text()
-            self.form.fieldList.takeItem(self.form.fieldList.selectedIndexes()[0].row())
-            fields = temp.split("}")
-            user = fields[0].split("{")[1]
-            deck = fields[1].split("{")[1]
-            date = fields[2].split("{")[1]
-            self.deadlines["deadlines"].get(user).pop(deck)
-            mw.addonManager.writeConfig(__name__, self.deadlines)
-
-            # Get the deck
-            deck_id = mw.col.decks.id_for_name(deck)
-            if deck_id:
-                deck_obj = mw.col.decks.get(deck_id)
-                if deck_obj:
-                    # Remove the deck-specific overrides
-                    deck_obj["newLimit"] = None
-                    deck_obj["reviewLimit"] = None
-                    mw.col.decks.save(deck_obj)
+        keys = [row.key for row in self.deadlineTable.selectedRows()]
+        if not keys:
+            return
+        # Restore the decks' limits and options groups in one undo step, then
+        # save the config once for all rows
+        with self.store.batch():
+            undo_pos = mw.col.add_custom_undo_entry("Remove Deadline")
+            removed, moved = remove_deadlines(mw.col, self.profileEntries(), keys)
+            mw.col.merge_undo_entries(undo_pos)
+            if moved:
+                from . import deck_index
+
+                deck_index.invalidate()
+            if removed:
+                self.store.save()
 
         # Refresh the fields list
         self.fillFields()
@@ -0,0 +1,179 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Pure pacing math. Works on plain counts and dates only: no Qt,
+#              no Anki imports and no collection access, so it is cheap to
+#              import and safe to use from threads and worker processes.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+from __future__ import division
+
+import datetime
+from collections import namedtuple
+from itertools import groupby
+
+# The outcome for one deadline. The first five fields are the tuples the
+# add-on has always passed around; the review forecast fields are filled in by
+# forecast.forecast_deadline (peak_day counts days from today), shortfall, the
+# cards that will not fit before the deadline, by allocate, and deck_id, the
+# deadline deck the limits are written to, by plan. lead_id is the deck id of
+# the deadline whose counts and limits a follower shares (see
+# processing.lead_deadlines), and None for deadlines counted on their own.
+Pacing = namedtuple(
+    "Pacing",
+    "name new_today new_cards days_left per_day review_limit peak_day peak_load "
+    "shortfall deck_id lead_id",
+    defaults=(None, None, None, None, None, None),
+)
+
+
+# find days until deadline
+def days_until_deadline(deadline_date, include_today=True, now=None):
+    if not deadline_date:
+        # No deadline date
+        return False
+    date_format = "%Y-%m-%d"
+    today = now or datetime.datetime.today()
+    deadline_date = datetime.datetime.strptime(deadline_date, date_format)
+    delta = deadline_date - today
+    if include_today:
+        days_left = delta.days + 1  # includes today
+    else:
+        days_left = delta.days  # today not included
+    if days_left < 1:
+        days_left = 0
+    return days_left
+
+
+def seconds_until_rollover(day_cutoff, now):
+    """Seconds from now (a timestamp) until the next day cutoff.
+
+    day_cutoff is col.sched.day_cutoff; if it already lies in the past, the
+    next cutoff is found by stepping a day at a time.
+    """
+    seconds = day_cutoff - now
+    while seconds <= 0:
+        seconds += 86400
+    return seconds
+
+
+# calculate cards per day
+def cards_per_day(new_cards, days_left):
+    if new_cards % days_left == 0:
+        per_day = int(new_cards / days_left)
+    else:
+        per_day = int(new_cards / days_left) + 1
+    # sanity check
+    if per_day < 0:
+        per_day = 0
+    return per_day
+
+
+def pace(new_cards, new_today, days_left):
+    """New cards per day needed to see every card in the group by the deadline"""
+    total_cards = new_cards + new_today
+    if days_left <= 0:
+        return total_cards  # Show all remaining cards if past deadline
+    return cards_per_day(total_cards, days_left)
+
+
+def active_deadlines(deadlines, include_today=True, now=None):
+    """Return [(deck id, deck name, days left)] for every deadline that has a date.
+
+    deadlines is an iterable of (deck id, deck name, date), as built by
+    store.deck_deadlines.
+    """
+    now = now or datetime.datetime.today()
+    active = []
+    for deck_id, name, date in deadlines:
+        days_left = days_until_deadline(date, include_today, now)
+        if days_left is not False:
+            active.append((deck_id, name, days_left))
+    return active
+
+
+def plan(active, counts):
+    """Pace many deadlines at once.
+
+    active is a list of (deck id, name, days_left) as built by
+    active_deadlines, and counts maps each deck id to its (new_cards,
+    new_today). Returns a Pacing per deadline, in order.
+    """
+    results = []
+    for deck_id, name, days_left in active:
+        new_cards, new_today = counts[deck_id]
+        results.append(
+            Pacing(
+                name,
+                new_today,
+                new_cards,
+                days_left,
+                pace(new_cards, new_today, days_left),
+                deck_id=deck_id,
+            )
+        )
+    return results
+
+
+def _fill(free, cards):
+    """Spread cards over the days in free as evenly as their room allows.
+
+    Water-filling: every day gets the same amount where it has room, and
+    days with less room are filled up. Leftover single cards go to the
+    earliest days, like cards_per_day rounding up. Returns the cards per day.
+    """
+    room = sum(free)
+    if cards >= room:
+        return list(free)
+    # Find the highest level every day can be filled to without going over
+    level = 0
+    remaining = cards
+    open_days = sorted(free)
+    while open_days:
+        step = open_days[0] - level
+        needed = step * len(open_days)
+        if needed > remaining:
+            level += remaining // len(open_days)
+            remaining %= len(open_days)
+            break
+        level += step
+        remaining -= needed
+        while open_days and open_days[0] <= level:
+            open_days.pop(0)
+    taken = []
+    for space in free:
+        amount = min(space, level)
+        if remaining and space > level:
+            amount += 1
+            remaining -= 1
+        taken.append(amount)
+    return taken
+
+
+def allocate(results, budget):
+    """Share a daily budget of new cards between many deadlines.
+
+    Earliest deadline first: deadlines are planned in order of days left,
+    each spreading its cards as evenly as possible over the room the earlier
+    ones left in the days before it. Deadlines with the same days left are
+    planned together and split each day's room evenly. Cards seen today
+    count against today's budget. Returns new Pacing tuples, in order, with
+    per_day set to today's share and shortfall to the cards that did not fit
+    before the deadline.
+    """
+    horizon = max((max(r.days_left, 1) for r in results), default=1)
+    free = [budget] * horizon
+    allocated = {}
+    order = sorted(range(len(results)), key=lambda i: results[i].days_left)
+    for days, band in groupby(order, key=lambda i: max(results[i].days_left, 1)):
+        band = list(band)
+        left = [results[i].new_cards + results[i].new_today for i in band]
+        today = None
+        for day, amount in enumerate(_fill(free[:days], sum(left))):
+            free[day] -= amount
+            shares = _fill(left, amount)
+            left = [cards - share for cards, share in zip(left, shares)]
+            if today is None:
+                today = shares
+        for i, per_day, shortfall in zip(band, today, left):
+            allocated[i] = results[i]._replace(per_day=per_day, shortfall=shortfall)
+    return [allocated[i] for i in range(len(results))]
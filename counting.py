@@ -0,0 +1,201 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Batched card counting queries. Every function takes the
+#              collection explicitly and answers for many decks in a single
+#              grouped query instead of one round trip per deck.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+import threading
+
+
+def ids2str(ids):
+    """Format a list of ids as an SQL list, eg '(1,2,3)'"""
+    return "(" + ",".join(str(int(i)) for i in ids) + ")"
+
+
+def day_start_ms(day_cutoff):
+    """The revlog id at which the current scheduler day began.
+
+    day_cutoff is col.sched.day_cutoff, the time the next day starts, so
+    today began one day earlier.
+    """
+    return (day_cutoff - 86400) * 1000
+
+
+# Count new cards for many decks at once
+def new_cards_by_deck(col, deck_ids):
+    """Return {deck_id: new card count}, excluding suspended and buried cards"""
+    if not deck_ids:
+        return {}
+    return dict(
+        col.db.all(
+            f"""
+        SELECT did, count() FROM cards
+        WHERE type = 0
+        AND queue != -1
+        AND queue != -2
+        AND did IN {ids2str(deck_ids)}
+        GROUP BY did"""
+        )
+    )
+
+
+# Count cards first seen today for many decks at once
+def first_seen_cards_by_deck(col, deck_ids, day_cutoff):
+    """Return {deck_id: number of distinct cards with a learning review today}"""
+    if not deck_ids:
+        return {}
+    return dict(
+        col.db.all(
+            f"""
+        SELECT did, count() FROM cards
+        WHERE id IN (
+            SELECT DISTINCT cid FROM revlog
+            WHERE type = 0
+            AND id >= ?
+        )
+        AND did IN {ids2str(deck_ids)}
+        GROUP BY did""",
+            day_start_ms(day_cutoff),
+        )
+    )
+
+
+class FirstSeenCache:
+    """Per-deck counts of cards first seen today.
+
+    The first update() of a day range-scans the revlog from the day's start;
+    later calls only read reviews newer than the last one seen, so the
+    count for today becomes a dictionary lookup. Cards are attributed to
+    the deck they were in when their first review was read.
+    Background runs and the main thread share one cache, so every method
+    holds a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.invalidate()
+
+    def invalidate(self, *args):
+        """Forget everything; accepts and ignores hook arguments"""
+        with self._lock:
+            self.day_cutoff = None
+            self.high_water = 0  # newest revlog id read
+            self._cards = set()
+            self._counts = {}
+
+    def update(self, col, day_cutoff):
+        """Read reviews logged since the last update, starting over on a new day"""
+        with self._lock:
+            if day_cutoff != self.day_cutoff:
+                self.invalidate()
+                self.day_cutoff = day_cutoff
+                self.high_water = day_start_ms(day_cutoff) - 1
+            rows = col.db.all(
+                """
+        SELECT r.id, r.cid, c.did FROM revlog r
+        LEFT JOIN cards c ON c.id = r.cid
+        WHERE r.id > ?
+        AND r.type = 0
+        ORDER BY r.id""",
+                self.high_water,
+            )
+            for review_id, card_id, deck_id in rows:
+                self.high_water = review_id
+                if deck_id is None or card_id in self._cards:
+                    continue
+                self._cards.add(card_id)
+                self._counts[deck_id] = self._counts.get(deck_id, 0) + 1
+        return self
+
+    def counts(self, deck_ids):
+        """Return {deck_id: cards first seen today} for decks with any"""
+        with self._lock:
+            return {d: self._counts[d] for d in deck_ids if d in self._counts}
+
+    def read(self, col, day_cutoff, deck_ids):
+        """update() then counts(), with no invalidate() in between"""
+        with self._lock:
+            return self.update(col, day_cutoff).counts(deck_ids)
+
+
+def count_groups(col, groups, day_cutoff, first_seen=None):
+    """Count new and first-seen cards for several deck groups.
+
+    groups maps a key (eg a deadline deck name) to the list of deck ids whose
+    cards it covers. Decks shared between groups are only counted once.
+    first_seen is an optional FirstSeenCache used instead of the revlog query.
+    Returns {key: (new_cards, new_today)}.
+    """
+    deck_ids = set()
+    for dids in groups.values():
+        deck_ids.update(dids)
+    deck_ids = sorted(deck_ids)
+    new = new_cards_by_deck(col, deck_ids)
+    if first_seen is not None:
+        seen = first_seen.read(col, day_cutoff, deck_ids)
+    else:
+        seen = first_seen_cards_by_deck(col, deck_ids, day_cutoff)
+    return {
+        key: (
+            sum(new.get(d, 0) for d in dids),
+            sum(seen.get(d, 0) for d in dids),
+        )
+        for key, dids in groups.items()
+    }
+
+
+# Load the due reviews of many decks at once
+def review_due_by_deck(col, deck_ids, today, horizon):
+    """Return {deck_id: [(day, ivl, count)]} for reviews due in the next horizon days.
+
+    day counts from today (col.sched.today); overdue cards and cards in
+    intraday learning are due on day 0. Cards with the same deck, day and
+    interval are grouped into one row.
+    """
+    if not deck_ids:
+        return {}
+    ids = ids2str(deck_ids)
+    by_deck = {}
+    for did, day, ivl, count in col.db.all(
+        f"""
+        SELECT did, max(due - ?, 0), ivl, count() FROM cards
+        WHERE queue IN (2, 3)
+        AND due < ?
+        AND did IN {ids}
+        GROUP BY 1, 2, 3
+        UNION ALL
+        SELECT did, 0, 0, count() FROM cards
+        WHERE queue = 1
+        AND did IN {ids}
+        GROUP BY did""",
+        today,
+        today + horizon,
+    ):
+        by_deck.setdefault(did, []).append((day, ivl, count))
+    return by_deck
+
+
+def review_groups(col, groups, today, horizons):
+    """Due review rows for several deck groups, for forecast.forecast_deadline.
+
+    groups maps a key to its deck ids as in count_groups, and horizons maps
+    each key to the number of days to load. Returns {key: [[day, ivl, count]]}
+    with rows of decks in the same group merged.
+    """
+    deck_ids = set()
+    for dids in groups.values():
+        deck_ids.update(dids)
+    by_deck = review_due_by_deck(
+        col, sorted(deck_ids), today, max(horizons.values(), default=1)
+    )
+    reviews = {}
+    for key, dids in groups.items():
+        horizon = horizons[key]
+        merged = {}
+        for did in dids:
+            for day, ivl, count in by_deck.get(did, ()):
+                if day < horizon:
+                    merged[day, ivl] = merged.get((day, ivl), 0) + count
+        reviews[key] = [[day, ivl, count] for (day, ivl), count in sorted(merged.items())]
+    return reviews
@@ -0,0 +1,66 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Table model behind the deadline list in the Configure Deadlines
+#              dialog: one structured row per deadline, sortable by any column.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+from collections import namedtuple
+
+from aqt.qt import *
+
+from .core import days_until_deadline
+from .store import deadline_entries
+from .tablemodel import RowTableModel, SortRole
+
+# key is the deadline's key in the config, see store.py
+DeadlineRow = namedtuple("DeadlineRow", "deck date days_left per_day key")
+
+
+def deadline_rows(col, profile_deadlines):
+    """Build a row per dated deadline, with the deck's current new card limit"""
+    rows = []
+    for key, deck_id, deck, date in deadline_entries(profile_deadlines):
+        if date == "":
+            continue
+        per_day = None
+        if deck_id is None:
+            deck_id = col.decks.id_for_name(deck)
+        if deck_id:
+            deck_obj = col.decks.get(deck_id, default=False)
+            if deck_obj:
+                per_day = deck_obj.get("newLimit")
+        rows.append(DeadlineRow(deck, date, days_until_deadline(date), per_day, key))
+    return rows
+
+
+class DeadlineTableModel(RowTableModel):
+    headers = ("Deck", "Deadline", "Days left", "New cards/day")
+
+    def setRows(self, rows):
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.endResetModel()
+
+
+class DeadlineTable:
+    """Connects a QTableView to a DeadlineTableModel through a sorting proxy"""
+
+    def __init__(self, view):
+        self.view = view
+        self.model = DeadlineTableModel(view)
+        self.proxy = QSortFilterProxyModel(view)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(SortRole)
+        self.view.setModel(self.proxy)
+        self.view.sortByColumn(2, Qt.SortOrder.AscendingOrder)
+
+    def setRows(self, rows):
+        self.model.setRows(rows)
+        self.view.resizeColumnToContents(0)
+
+    def selectedRows(self):
+        """The DeadlineRows selected in the view"""
+        return [
+            self.model.rows[self.proxy.mapToSource(index).row()]
+            for index in self.view.selectionModel().selectedRows()
+        ]
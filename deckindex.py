@@ -0,0 +1,84 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Cached reverse indexes over the collection's decks and options
+#              groups, so deadline lookups don't rescan every deck.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+import threading
+
+from .assign import preset_tag
+
+
+class DeckIndex:
+    """Lookup tables built from a single pass over decks and options groups.
+
+    The index is built lazily on first use and kept until invalidate() is
+    called (on deck or options group changes) or a different collection is
+    passed in. Collections are told apart by their deck manager, so wrappers
+    around the same collection share the index. Building and invalidating
+    hold a lock, as background runs share the index with the main thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._decks = None
+        self._deck_ids = {}  # deck name -> deck id
+        self._deck_names = {}  # deck id -> deck name
+        self._deck_conf = {}  # deck id -> options group id
+        self._conf_decks = {}  # options group id -> [deck ids]
+        self._pooled = set()  # ids of the add-on's pooled options groups
+
+    def invalidate(self, *args):
+        """Drop the cached tables; accepts and ignores hook arguments"""
+        with self._lock:
+            self._decks = None
+
+    def get(self, col):
+        """Return the index for col, building it if needed"""
+        with self._lock:
+            if self._decks is not col.decks:
+                self._build(col)
+        return self
+
+    def _build(self, col):
+        deck_ids = {}
+        deck_names = {}
+        deck_conf = {}
+        conf_decks = {}
+        for deck in col.decks.all():
+            deck_ids[deck["name"]] = deck["id"]
+            deck_names[deck["id"]] = deck["name"]
+            config_id = deck.get("conf_id")
+            if config_id:
+                deck_conf[deck["id"]] = config_id
+                conf_decks.setdefault(config_id, []).append(deck["id"])
+        pooled = set()
+        for conf in col.decks.all_config():
+            if preset_tag(conf):
+                pooled.add(conf["id"])
+        self._deck_ids = deck_ids
+        self._deck_names = deck_names
+        self._deck_conf = deck_conf
+        self._conf_decks = conf_decks
+        self._pooled = pooled
+        self._decks = col.decks
+
+    def deck_id(self, name):
+        """Deck id for a full deck name, or None"""
+        return self._deck_ids.get(name)
+
+    def deck_name(self, deck_id):
+        """Full name of a deck, or None"""
+        return self._deck_names.get(deck_id)
+
+    def deck_conf_id(self, deck_id):
+        """Options group id used by a deck, or None for filtered/unknown decks"""
+        return self._deck_conf.get(deck_id)
+
+    def decks_in_config(self, config_id):
+        """Ids of every deck using an options group"""
+        return list(self._conf_decks.get(config_id, ()))
+
+    def is_pooled(self, config_id):
+        """True for options groups the add-on created, see assign.assign_deadlines"""
+        return config_id in self._pooled
@@ -0,0 +1,108 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Model/view deck picker for the Add Deadline dialog. The view
+#              only creates rows as they are shown, and typing in the filter
+#              box narrows the tree without rebuilding it.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+from aqt.qt import *
+
+# Role holding a row's full deck name
+FullNameRole = Qt.ItemDataRole.UserRole
+
+
+class DeckTreeModel(QAbstractItemModel):
+    """Read-only item model over a DeckTree"""
+
+    def __init__(self, tree, parent=None):
+        QAbstractItemModel.__init__(self, parent)
+        self.tree = tree
+
+    def _node(self, index):
+        if index.isValid():
+            return index.internalPointer()
+        return self.tree.root
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent)
+        if column != 0 or not 0 <= row < len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.tree.root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        return bool(self._node(parent).children)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return node.name
+        if role in (Qt.ItemDataRole.ToolTipRole, FullNameRole):
+            return node.full_name
+        return None
+
+
+class DeckPicker:
+    """Connects a QTreeView and a filter QLineEdit to a DeckTree"""
+
+    # Wait this long after the last keystroke before filtering
+    FILTER_DELAY_MS = 150
+
+    def __init__(self, view, search):
+        self.view = view
+        self.search = search
+        self.model = None
+        self.proxy = QSortFilterProxyModel(view)
+        self.proxy.setRecursiveFilteringEnabled(True)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.proxy.setFilterRole(FullNameRole)
+        self.view.setModel(self.proxy)
+        self.timer = QTimer(view)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.FILTER_DELAY_MS)
+        self.timer.timeout.connect(self.applyFilter)
+        self.search.textChanged.connect(self.timer.start)
+
+    def setTree(self, tree):
+        """Show tree, collapsed to its top two levels"""
+        if self.model is None or self.model.tree is not tree:
+            self.model = DeckTreeModel(tree, self.view)
+            self.proxy.setSourceModel(self.model)
+        self.search.clear()
+        self.applyFilter()
+
+    def applyFilter(self):
+        text = self.search.text().strip()
+        self.proxy.setFilterFixedString(text)
+        if text:
+            self.view.expandAll()
+        else:
+            self.view.collapseAll()
+            self.view.expandToDepth(0)
+
+    def selectedDecks(self):
+        """Full names of the selected decks, in one pass over the selection"""
+        return [
+            index.data(FullNameRole)
+            for index in self.view.selectionModel().selectedRows()
+        ]
+
+    def clearSelection(self):
+        self.view.selectionModel().clearSelection()
@@ -0,0 +1,64 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: The deck hierarchy as a tree, built in one pass over deck names.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+
+class DeckNode:
+    __slots__ = ("name", "full_name", "id", "parent", "children", "row")
+
+    def __init__(self, name, full_name, id, parent, row):
+        self.name = name  # last component, eg "Topic 4"
+        self.full_name = full_name  # eg "Subject::Unit 2::Topic 4"
+        self.id = id
+        self.parent = parent
+        self.children = []
+        self.row = row  # position among the parent's children
+
+
+class DeckTree:
+    """Decks arranged by their '::' hierarchy, children sorted by name.
+
+    entries is an iterable of (full deck name, deck id) pairs, eg from
+    col.decks.all_names_and_ids().
+    """
+
+    def __init__(self, entries):
+        self.root = DeckNode("", "", None, None, 0)
+        self._nodes = {}
+        for full_name, deck_id in sorted(entries):
+            self._add(full_name, deck_id)
+
+    def _add(self, full_name, deck_id):
+        node = self._nodes.get(full_name)
+        if node is not None:
+            # Created earlier as the parent of a deck listed before it
+            node.id = deck_id
+            return node
+        parent_name, _, name = full_name.rpartition("::")
+        parent = self._add(parent_name, None) if parent_name else self.root
+        node = DeckNode(name, full_name, deck_id, parent, len(parent.children))
+        parent.children.append(node)
+        self._nodes[full_name] = node
+        return node
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def node(self, full_name):
+        return self._nodes.get(full_name)
+
+    def leaves(self, full_name):
+        """Decks without children at or below full_name, in tree order"""
+        start = self._nodes.get(full_name)
+        if start is None:
+            return []
+        leaves = []
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if node.children:
+                stack.extend(reversed(node.children))
+            else:
+                leaves.append(node)
+        return leaves
@@ -0,0 +1,174 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Timing and SQL counters for deadline runs, and the size-capped
+#              JSON-lines log they are appended to.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+import datetime
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# The log is trimmed to its newest half once it grows past this size
+MAX_LOG_BYTES = 512 * 1024
+
+
+class CountingDB:
+    """Wraps a collection's db, counting statements and returned rows"""
+
+    def __init__(self, db, stats):
+        self._db = db
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    def _count(self, rows):
+        self._stats.count_sql(rows)
+
+    def scalar(self, *args, **kwargs):
+        value = self._db.scalar(*args, **kwargs)
+        self._count(0 if value is None else 1)
+        return value
+
+    def first(self, *args, **kwargs):
+        row = self._db.first(*args, **kwargs)
+        self._count(0 if row is None else 1)
+        return row
+
+    def all(self, *args, **kwargs):
+        rows = self._db.all(*args, **kwargs)
+        self._count(len(rows))
+        return rows
+
+    def list(self, *args, **kwargs):
+        rows = self._db.list(*args, **kwargs)
+        self._count(len(rows))
+        return rows
+
+    def execute(self, *args, **kwargs):
+        rows = self._db.execute(*args, **kwargs)
+        self._count(len(rows) if rows else 0)
+        return rows
+
+
+class InstrumentedCollection:
+    """A collection whose db calls are counted in a RunStats"""
+
+    def __init__(self, col, stats):
+        self._col = col
+        self.db = CountingDB(col.db, stats)
+
+    def __getattr__(self, name):
+        return getattr(self._col, name)
+
+
+class RunStats:
+    """Phase timings and SQL counts for one deadline run"""
+
+    def __init__(self, label):
+        self.label = label
+        self.started = datetime.datetime.now().isoformat(timespec="seconds")
+        self.phases = {}  # phase -> seconds
+        self.deadlines = {}  # deadline deck -> {phase: seconds}
+        self.statements = 0
+        self.rows = 0
+        self._phase_sql = {}  # phase -> [statements, rows]
+        self._current = []
+
+    def count_sql(self, rows):
+        self.statements += 1
+        self.rows += rows
+        if self._current:
+            counts = self._phase_sql.setdefault(self._current[-1], [0, 0])
+            counts[0] += 1
+            counts[1] += rows
+
+    @contextmanager
+    def phase(self, name, deadline=None):
+        """Time a block, either for the whole run or for one deadline"""
+        self._current.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._current.pop()
+            if deadline is None:
+                self.phases[name] = self.phases.get(name, 0) + elapsed
+            else:
+                phases = self.deadlines.setdefault(deadline, {})
+                phases[name] = phases.get(name, 0) + elapsed
+
+    def wrap(self, col):
+        """Return col with its SQL statements counted in this run"""
+        return InstrumentedCollection(col, self)
+
+    def as_dict(self):
+        return {
+            "label": self.label,
+            "started": self.started,
+            "total": sum(self.phases.values()),
+            "phases": self.phases,
+            "sql": {
+                "statements": self.statements,
+                "rows": self.rows,
+                "phases": self._phase_sql,
+            },
+            "deadlines": self.deadlines,
+        }
+
+    def summary(self):
+        """Readable report of the run, slowest deadlines first"""
+        lines = [
+            f"{self.label} at {self.started}",
+            f"Total: {sum(self.phases.values()) * 1000:.1f} ms, "
+            f"{self.statements} SQL statements, {self.rows} rows",
+            "",
+            "Phases:",
+        ]
+        for name, seconds in self.phases.items():
+            statements, rows = self._phase_sql.get(name, (0, 0))
+            lines.append(
+                f"  {name}: {seconds * 1000:.1f} ms ({statements} SQL, {rows} rows)"
+            )
+        if self.deadlines:
+            lines += ["", "Deadlines (slowest first):"]
+            ranked = sorted(
+                self.deadlines.items(), key=lambda kv: -sum(kv[1].values())
+            )
+            for deck, phases in ranked:
+                detail = ", ".join(
+                    f"{name} {seconds * 1000:.2f} ms" for name, seconds in phases.items()
+                )
+                lines.append(f"  {deck}: {detail}")
+        return "\n".join(lines)
+
+
+class NullStats:
+    """Stand-in used when a run is not being measured"""
+
+    @contextmanager
+    def phase(self, name, deadline=None):
+        yield
+
+    def wrap(self, col):
+        return col
+
+
+NO_STATS = NullStats()
+
+
+def append_log(path, record, max_bytes=MAX_LOG_BYTES):
+    """Append record as one JSON line, keeping the file under max_bytes"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf8") as f:
+        f.write(json.dumps(record) + "\n")
+    if os.path.getsize(path) > max_bytes:
+        with open(path, encoding="utf8") as f:
+            lines = f.readlines()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf8") as f:
+            f.writelines(lines[len(lines) // 2 :])
+        os.replace(tmp, path)
@@ -0,0 +1,69 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Daily workload forecast up to each deadline, used to size
+#              review limits. Pure Python on plain lists: no Qt, no Anki
+#              imports and no collection access.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+# Days after its first review at which a new card is typically due again,
+# following Anki's default learning steps and starting ease
+NEW_CARD_FOLLOWUPS = (1, 3, 7, 16, 35)
+
+# Interval growth assumed for each passed review (Anki's default ease)
+EASE = 2.5
+
+
+def new_card_kernel(horizon):
+    """kernel[t] is how many earlier days' new cards come up for review on day t.
+
+    With the same number of new cards introduced every day, day t's reviews
+    from new cards are per_day * kernel[t]. The kernel only depends on the
+    horizon, so it is built once and shared by every deadline.
+    """
+    kernel = [0] * horizon
+    for step in NEW_CARD_FOLLOWUPS:
+        for day in range(step, horizon):
+            kernel[day] += 1
+    return kernel
+
+
+def review_load(reviews, horizon):
+    """Project due reviews onto a list of daily counts, day 0 being today.
+
+    reviews is a list of (day, ivl, count) rows as built by
+    counting.review_groups. Each card is assumed to pass, coming back after
+    its interval grown by EASE; cards without an interval (learning) are
+    counted once.
+    """
+    load = [0] * horizon
+    for day, ivl, count in reviews:
+        while day < horizon:
+            load[day] += count
+            if ivl <= 0:
+                break
+            ivl = max(ivl + 1, round(ivl * EASE))
+            day += ivl
+    return load
+
+
+def forecast_deadline(result, reviews, kernel):
+    """Add the review limit and peak day to one core.Pacing.
+
+    reviews are the deadline's due review rows and kernel a new_card_kernel
+    at least as long as the deadline's horizon. The forecast covers today up
+    to the last day before the deadline (just today once it has passed). The
+    review limit is the busiest day's projected reviews, so the deadline's
+    peak can be met without the rest of the collection being crowded out,
+    and never less than the new card limit.
+    """
+    horizon = max(result.days_left, 1)
+    load = review_load(reviews, horizon)
+    for day in range(horizon):
+        load[day] += result.per_day * kernel[day]
+    peak_load = max(load)
+    return result._replace(
+        review_limit=max(peak_load, result.per_day),
+        peak_day=load.index(peak_load),
+        peak_load=peak_load,
+    )
+
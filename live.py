@@ -0,0 +1,98 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: The last run's results, kept current between runs. Card events
+#              adjust the remaining counts of only the deadlines whose decks
+#              they touch, so limits follow the collection during the day
+#              without recounting anything.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+import time
+
+from .core import pace
+
+
+class LiveCounts:
+    """Pacing of every deadline from the last run, updated in place by card events"""
+
+    def __init__(self):
+        self.invalidate()
+
+    def invalidate(self, *args):
+        """Forget everything; accepts and ignores hook arguments"""
+        self.results = {}  # deadline deck id -> core.Pacing
+        self._deadlines = {}  # deck id -> deadline deck ids counting its cards
+        self._pace_days = {}  # deadline deck id -> days left its group is paced by
+        self.computed_at = None  # when load() was last called
+        self.budget = None  # daily budget the results were allocated from
+
+    def load(self, results, groups, budget=None):
+        """Start over from a run's results.
+
+        groups maps each deadline deck id to the deck ids it counts, as built by
+        processing.deck_groups. Deadlines counting the same decks are paced
+        by the earliest of them, as processing.lead_deadlines does.
+        budget is the daily budget the results were shared from, if any.
+        """
+        self.invalidate()
+        self.computed_at = time.time()
+        self.budget = budget
+        earliest = {}  # counted deck ids -> fewest days left
+        for result in results:
+            self.results[result.deck_id] = result
+            dids = tuple(sorted(groups.get(result.deck_id, ())))
+            earliest[dids] = min(earliest.get(dids, result.days_left), result.days_left)
+            for deck_id in dids:
+                self._deadlines.setdefault(deck_id, []).append(result.deck_id)
+        for result in results:
+            dids = tuple(sorted(groups.get(result.deck_id, ())))
+            self._pace_days[result.deck_id] = earliest[dids]
+
+    def deadlines_for(self, deck_id):
+        return self._deadlines.get(deck_id, [])
+
+    def _adjust(self, deck_ids, new_cards, new_today):
+        """Move the counts of the deadlines covering deck_ids (one id per card).
+
+        With a budget the limits are the allocated shares and stay as they
+        are; only a recount can share the budget again.
+        Returns the updated Pacing of deadlines whose new card limit changed.
+        """
+        before = {}  # deadline deck id -> new card limit before this event
+        for deck_id in deck_ids:
+            for deadline in self.deadlines_for(deck_id):
+                result = self.results[deadline]
+                before.setdefault(deadline, result.per_day)
+                remaining = max(result.new_cards + new_cards, 0)
+                seen = max(result.new_today + new_today, 0)
+                if self.budget:
+                    self.results[deadline] = result._replace(
+                        new_cards=remaining, new_today=seen
+                    )
+                    continue
+                per_day = pace(remaining, seen, self._pace_days[deadline])
+                review_limit = result.review_limit
+                if review_limit is not None:
+                    review_limit = max(review_limit, per_day)
+                self.results[deadline] = result._replace(
+                    new_cards=remaining,
+                    new_today=seen,
+                    per_day=per_day,
+                    review_limit=review_limit,
+                )
+        return [
+            self.results[deadline]
+            for deadline, per_day in before.items()
+            if self.results[deadline].per_day != per_day
+        ]
+
+    def cards_added(self, deck_ids):
+        """New cards were added to these decks"""
+        return self._adjust(deck_ids, 1, 0)
+
+    def card_seen(self, deck_id):
+        """A new card in this deck was answered for the first time.
+
+        The card moves from remaining to seen today, which leaves every
+        deadline's daily pace as it was.
+        """
+        return self._adjust([deck_id], -1, 1)
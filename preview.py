@@ -0,0 +1,123 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Live preview for the Add Deadline window. Counts are read once
+#              when the window opens; every later date or deck change is
+#              answered from memory without touching the collection.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+from collections import namedtuple
+
+from .assign import deadline_targets
+from .core import days_until_deadline, pace
+from .counting import first_seen_cards_by_deck, new_cards_by_deck
+
+# What a deadline on the selected decks would ask for. decks is how many
+# decks would get the deadline and skipped how many selected decks have
+# children but subdecks is unchecked, so nothing would happen to them.
+# shared is how many of the decks are on one of the user's own options
+# groups and so are counted with every deck on it.
+Preview = namedtuple(
+    "Preview", "decks skipped new_cards new_today days_left per_day shared",
+    defaults=(0,),
+)
+
+
+class DeckCounts:
+    """New and first-seen-today card counts of every deck in the collection"""
+
+    def __init__(self, col, day_cutoff, first_seen=None):
+        deck_ids = sorted(d.id for d in col.decks.all_names_and_ids())
+        self.new = new_cards_by_deck(col, deck_ids)
+        if first_seen is not None:
+            self.seen = first_seen.read(col, day_cutoff, deck_ids)
+        else:
+            self.seen = first_seen_cards_by_deck(col, deck_ids, day_cutoff)
+
+
+def preview(
+    tree, counts, decks, date, subdecks=False, now=None, index=None, active=()
+):
+    """Pace a deadline on date for decks, picked as by assign.deadline_targets.
+
+    counts is a DeckCounts. Decks that assign_deadlines moves to the add-on's
+    pooled options groups are paced on their own cards. Given index, a
+    DeckIndex, decks on the user's own groups are paced as compute_deadlines
+    will: once per group, on every deck using it, by the earliest of date
+    and the other deadlines in active (as built by core.active_deadlines)
+    on that group. Without index every deck is paced on its own cards.
+    per_day is the total over decks and groups.
+    """
+    targets = deadline_targets(tree, decks, subdecks)
+    skipped = 0
+    if not subdecks:
+        for deck in decks:
+            node = tree.node(deck)
+            if node is not None and node.children:
+                skipped += 1
+    days_left = days_until_deadline(date, now=now) or 0
+
+    alone = []
+    groups = {}  # options group id -> earliest days left
+    for deck_id in targets:
+        config_id = index.deck_conf_id(deck_id) if index is not None else None
+        if not config_id or config_id == 1 or index.is_pooled(config_id):
+            alone.append(deck_id)
+        else:
+            groups[config_id] = days_left
+    if groups:
+        # The new deadline replaces any the selected decks already have
+        for deck_id, _, other_days in active:
+            config_id = index.deck_conf_id(deck_id)
+            if config_id in groups and deck_id not in targets:
+                groups[config_id] = min(groups[config_id], other_days)
+
+    counted = list(alone)
+    per_day = sum(
+        pace(counts.new.get(d, 0), counts.seen.get(d, 0), days_left) for d in alone
+    )
+    for config_id, lead_days in groups.items():
+        members = index.decks_in_config(config_id)
+        counted += members
+        per_day += pace(
+            sum(counts.new.get(d, 0) for d in members),
+            sum(counts.seen.get(d, 0) for d in members),
+            lead_days,
+        )
+    new_cards = sum(counts.new.get(d, 0) for d in counted)
+    new_today = sum(counts.seen.get(d, 0) for d in counted)
+    return Preview(
+        len(targets),
+        skipped,
+        new_cards,
+        new_today,
+        days_left,
+        per_day,
+        len(targets) - len(alone),
+    )
+
+
+def describe(result):
+    """One or two lines of text for the preview label"""
+    if not result.decks:
+        if result.skipped:
+            return (
+                "The selected decks have sub-decks; check "
+                "\"Apply to All Sub-Decks\" to add the deadline to them."
+            )
+        return "Select decks to preview their daily new cards."
+    text = (
+        f"{result.decks} decks, {result.new_cards} new cards left, "
+        f"{result.new_today} seen today.\n"
+    )
+    if result.days_left <= 0:
+        text += "The date has passed: every remaining card would be shown today."
+    else:
+        text += f"{result.per_day} new cards/day for {result.days_left} days."
+    if result.skipped:
+        text += f"\n{result.skipped} decks with sub-decks are skipped."
+    if result.shared:
+        text += (
+            f"\n{result.shared} decks share an options group with other decks "
+            "and are paced with all of them, by the group's earliest deadline."
+        )
+    return text
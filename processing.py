@@ -0,0 +1,171 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Read-only deadline computation: gathers counts from a
+#              collection and hands them to the pacing math in core.py.
+#              Nothing here touches the UI or writes to the collection, so it
+#              can run in a background thread.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+import datetime
+
+from .core import Pacing, allocate, plan
+from .counting import count_groups, review_groups
+from .diagnostics import NO_STATS
+from .forecast import forecast_deadline, new_card_kernel
+from .snapshot import group_stamps
+
+
+class ProcessingCancelled(Exception):
+    """Raised by a progress callback to stop a deadline run"""
+
+
+def deck_groups(index, deck_ids):
+    """Map each deadline deck id to the decks whose cards it counts.
+
+    That is every deck sharing its options group, except on the add-on's
+    pooled groups: decks only share those for their settings, so each
+    counts its own cards.
+    """
+    groups = {}
+    for deck_id in deck_ids:
+        config_id = index.deck_conf_id(deck_id)
+        if not config_id:
+            groups[deck_id] = []
+        elif index.is_pooled(config_id):
+            groups[deck_id] = [deck_id]
+        else:
+            groups[deck_id] = index.decks_in_config(config_id)
+    return groups
+
+
+def lead_deadlines(index, active):
+    """Group deadlines by options group, since limits are set per group.
+
+    active is a list of (deck id, name, days_left) as built by
+    core.active_deadlines. The earliest deadline of each group leads it and
+    decides the group's limits; ties go to the deadline listed first.
+    Deadlines whose deck is on no options group or on one of the add-on's
+    pooled groups each stand alone.
+    Returns {lead deck id: [every deadline deck id in its group]}, in the
+    order the leads appear in active.
+    """
+    leads = {}  # options group id -> (days_left, lead deck id)
+    members = {}  # lead deck id -> deadline deck ids
+    for deck_id, _, days_left in active:
+        config_id = index.deck_conf_id(deck_id)
+        if not config_id or index.is_pooled(config_id):
+            members[deck_id] = [deck_id]
+            continue
+        lead = leads.get(config_id)
+        if lead is None:
+            leads[config_id] = (days_left, deck_id)
+            members[deck_id] = [deck_id]
+        else:
+            followers = members.pop(lead[1])
+            followers.append(deck_id)
+            if days_left < lead[0]:
+                lead = leads[config_id] = (days_left, deck_id)
+            members[lead[1]] = followers
+    order = {deck_id: i for i, (deck_id, _, _) in enumerate(active)}
+    return dict(sorted(members.items(), key=lambda item: order[item[0]]))
+
+
+def compute_deadlines(
+    col,
+    index,
+    active,
+    day_cutoff,
+    progress=None,
+    snapshot=None,
+    first_seen=None,
+    stats=NO_STATS,
+    budget=None,
+):
+    """Count and pace every active deadline without writing anything.
+
+    index is a DeckIndex for col and active comes from core.active_deadlines.
+    progress, if given, is called as progress(label, value, max) between
+    steps and may raise ProcessingCancelled.
+    snapshot, if given, is a Snapshot holding the last run's counts and due
+    reviews; only deadlines whose decks changed since then are recounted.
+    The caller is responsible for saving it.
+    first_seen, if given, is a FirstSeenCache that replaces the revlog query.
+    stats, if given, is a RunStats that receives phase timings and SQL counts.
+    budget, if given, is the most new cards to study per day across every
+    deadline; see core.allocate.
+    Deadlines sharing an options group are counted once, led by the earliest
+    of them (see lead_deadlines), and all get the lead's limits; only the
+    lead has a forecast peak and shortfall.
+    Returns a core.Pacing per deadline, including its review forecast.
+    """
+    col = stats.wrap(col)
+    if progress:
+        progress("Counting new cards...", 0, 2)
+    with stats.phase("deck lookup"):
+        deck_index = index.get(col)
+        members = lead_deadlines(deck_index, active)
+        leads = [deadline for deadline in active if deadline[0] in members]
+        groups = deck_groups(deck_index, members)
+
+    horizons = {deck_id: max(days_left, 1) for deck_id, _, days_left in leads}
+    counts = {}
+    reviews = {}
+    if snapshot is not None:
+        with stats.phase("watermarks"):
+            today = datetime.date.today().isoformat()
+            stamps = group_stamps(col, groups, day_cutoff, today, horizons)
+            for deck_id, _, _ in leads:
+                cached = snapshot.lookup(deck_id, stamps[deck_id])
+                if cached is not None:
+                    counts[deck_id], reviews[deck_id] = cached
+    dirty = {deck_id: dids for deck_id, dids in groups.items() if deck_id not in counts}
+    if dirty:
+        with stats.phase("count"):
+            counts.update(count_groups(col, dirty, day_cutoff, first_seen))
+        with stats.phase("due reviews"):
+            reviews.update(review_groups(col, dirty, col.sched.today, horizons))
+        if snapshot is not None:
+            for deck_id in dirty:
+                snapshot.record(
+                    deck_id, stamps[deck_id], counts[deck_id], reviews[deck_id]
+                )
+    if snapshot is not None:
+        snapshot.prune(groups)
+
+    if progress:
+        progress("Pacing deadlines...", 1, 2)
+    with stats.phase("pace"):
+        results = []
+        for lead in leads:
+            with stats.phase("pace", lead[1]):
+                results += plan([lead], counts)
+    if budget:
+        with stats.phase("budget"):
+            results = allocate(results, budget)
+    with stats.phase("forecast"):
+        kernel = new_card_kernel(max(horizons.values(), default=1))
+        forecasts = {}
+        for result in results:
+            with stats.phase("forecast", result.name):
+                forecasts[result.deck_id] = forecast_deadline(
+                    result, reviews.get(result.deck_id, ()), kernel
+                )
+        results = forecasts
+    # Followers share their lead's counts and limits but keep their own date
+    led_by = {deck_id: lead for lead, ids in members.items() for deck_id in ids}
+    ordered = []
+    for deck_id, name, days_left in active:
+        lead = results[led_by[deck_id]]
+        if deck_id != lead.deck_id:
+            lead = Pacing(
+                name,
+                lead.new_today,
+                lead.new_cards,
+                days_left,
+                lead.per_day,
+                lead.review_limit,
+                deck_id=deck_id,
+                lead_id=lead.deck_id,
+            )
+        ordered.append(lead)
+    return ordered
@@ -0,0 +1,76 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: One-off cProfile and tracemalloc captures of a deadline run or
+#              dialog session, written to files that can be sent in with a
+#              bug report.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+import cProfile
+import datetime
+import io
+import os
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+
+# How many functions and allocation sites the text summary lists
+TOP_ENTRIES = 25
+
+
+class Capture:
+    """Where a capture was written and what it found"""
+
+    def __init__(self, label, folder):
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(folder, f"{label.lower().replace(' ', '-')}-{stamp}")
+        self.label = label
+        self.stats_path = base + ".prof"
+        self.summary_path = base + ".txt"
+        self.peak_bytes = 0
+        self.summary = ""
+
+
+def _summary(capture, profiler, snapshot):
+    out = io.StringIO()
+    out.write(f"{capture.label} profiled at {datetime.datetime.now().isoformat(timespec='seconds')}\n")
+    out.write(f"Peak traced memory: {capture.peak_bytes / 1024:.1f} KiB\n\n")
+    out.write(f"Top {TOP_ENTRIES} functions by cumulative time:\n")
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(TOP_ENTRIES)
+    out.write(f"Top {TOP_ENTRIES} allocation sites:\n")
+    for stat in snapshot.statistics("lineno")[:TOP_ENTRIES]:
+        out.write(f"  {stat}\n")
+    out.write(f"\nFull profile: {capture.stats_path}\n")
+    out.write("Open it with: python -m pstats <file>, or snakeviz\n")
+    return out.getvalue()
+
+
+@contextmanager
+def capture(label, folder):
+    """Profile the calls and memory use of the block.
+
+    Only the calling thread is profiled, so run the work in the foreground.
+    tracemalloc is left running if something else had started it.
+    Yields a Capture whose files exist once the block exits.
+    """
+    result = Capture(label, folder)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        result.peak_bytes = tracemalloc.get_traced_memory()[1]
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        if started_tracing:
+            tracemalloc.stop()
+        os.makedirs(folder, exist_ok=True)
+        profiler.dump_stats(result.stats_path)
+        result.summary = _summary(result, profiler, snapshot)
+        with open(result.summary_path, "w", encoding="utf8") as f:
+            f.write(result.summary)
@@ -0,0 +1,180 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Non-modal window listing the results of deadline runs. Rows
+#              are added and updated in place as results come in, and the
+#              table can be sorted by any column.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+import datetime
+
+from aqt.qt import *
+
+from .tablemodel import RowTableModel, SortRole
+
+
+def peak_date(result, today=None):
+    """The date of a result's busiest forecast day, or None without a forecast"""
+    if result.peak_day is None:
+        return None
+    today = today or datetime.date.today()
+    return (today + datetime.timedelta(days=result.peak_day)).isoformat()
+
+
+class ResultsTableModel(RowTableModel):
+    """One row per deadline, holding its latest core.Pacing"""
+
+    headers = (
+        "Deck",
+        "Days left",
+        "New cards left",
+        "Seen today",
+        "New cards/day",
+        "Review limit",
+        "Peak day",
+        "Over budget",
+    )
+
+    def __init__(self, parent=None):
+        RowTableModel.__init__(self, parent)
+        self._row_of = {}  # deadline deck id -> row
+
+    def clear(self):
+        self.beginResetModel()
+        self.rows = []
+        self._row_of = {}
+        self.endResetModel()
+
+    def addResults(self, results):
+        """Append new deadlines and update the rows of ones already listed"""
+        added = []
+        for result in results:
+            row = self._row_of.get(result.deck_id)
+            if row is None:
+                added.append(result)
+                continue
+            self.rows[row] = result
+            self.dataChanged.emit(
+                self.index(row, 0), self.index(row, len(self.headers) - 1)
+            )
+        if added:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for row, result in enumerate(added, first):
+                self._row_of[result.deck_id] = row
+                self.rows.append(result)
+            self.endInsertRows()
+
+    def totals(self):
+        """Sums over every listed deadline, as (new cards left, seen today,
+        new cards per day, review limit). Followers repeat their lead's
+        numbers, so an options group shared by deadlines counts once."""
+        leads = [r for r in self.rows if r.lead_id is None]
+        return (
+            sum(r.new_cards for r in leads),
+            sum(r.new_today for r in leads),
+            sum(r.per_day for r in leads),
+            sum(r.review_limit or 0 for r in leads),
+        )
+
+    def behind(self):
+        """How many listed deadlines cannot be met within the budget"""
+        return sum(1 for r in self.rows if r.shortfall)
+
+    def value(self, result, column):
+        if column == 0:
+            return result.name
+        if column == 1:
+            return result.days_left
+        if column == 2:
+            return result.new_cards
+        if column == 3:
+            return result.new_today
+        if column == 4:
+            return result.per_day
+        if column == 5:
+            return result.review_limit
+        if column == 6:
+            return peak_date(result)
+        # Only deadlines that cannot be met within the budget show a number
+        return result.shortfall or None
+
+    def sortValue(self, value, column):
+        # Missing forecasts sort before every value
+        if value is None:
+            return "" if column == 6 else -1
+        return value
+
+    def roleData(self, result, column, value, role):
+        if role == Qt.ItemDataRole.ToolTipRole and column == 6:
+            if result.peak_load is not None:
+                return f"{result.peak_load} reviews forecast"
+        if role == Qt.ItemDataRole.ToolTipRole and column == 7:
+            if value:
+                return f"{value} cards will not fit before the deadline"
+        if role == Qt.ItemDataRole.ForegroundRole and result.shortfall:
+            return QBrush(QColor("red"))
+        return None
+
+
+class ResultsWindow(QDialog):
+    """Lists deadline results without blocking Anki or the run producing them"""
+
+    def __init__(self, parent):
+        QDialog.__init__(self, parent)
+        self.setWindowTitle("Deadline Results")
+        self.setModal(False)
+        self.resize(700, 500)
+
+        self.status = QLabel()
+        self.model = ResultsTableModel(self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(SortRole)
+        self.view = QTableView()
+        self.view.setModel(self.proxy)
+        self.view.setSortingEnabled(True)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.view.verticalHeader().hide()
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.view.sortByColumn(1, Qt.SortOrder.AscendingOrder)
+        self.totals = QLabel()
+        buttonBox = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        buttonBox.rejected.connect(self.close)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.status)
+        layout.addWidget(self.view)
+        layout.addWidget(self.totals)
+        layout.addWidget(buttonBox)
+        self.setLayout(layout)
+
+    def startRun(self):
+        """Clear the table and show the window while a run is in progress"""
+        self.model.clear()
+        self.status.setText("Processing deadlines...")
+        self.updateTotals()
+        self.show()
+        self.raise_()
+
+    def showResults(self, results):
+        """Add or update rows for results, showing the window if it is hidden"""
+        self.model.addResults(results)
+        self.view.resizeColumnToContents(0)
+        status = f"{len(self.model.rows)} deadlines processed"
+        behind = self.model.behind()
+        if behind:
+            status += f", {behind} cannot be met within the daily budget"
+        self.status.setText(status)
+        self.updateTotals()
+        self.show()
+
+    def runFailed(self, message):
+        self.status.setText(message)
+
+    def updateTotals(self):
+        new_cards, new_today, per_day, review_limit = self.model.totals()
+        self.totals.setText(
+            f"Total: {new_cards} new cards left, {new_today} seen today, "
+            f"{per_day} new cards/day, review limits {review_limit}"
+        )
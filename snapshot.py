@@ -0,0 +1,113 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Persisted record of the inputs each deadline was last computed
+#              from, so repeat runs only recount deadlines whose decks changed.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+import json
+import os
+
+from .counting import day_start_ms, ids2str
+
+
+def revlog_high_water(col, day_cutoff):
+    """Id of the newest learning review today, or 0"""
+    return (
+        col.db.scalar(
+            "SELECT max(id) FROM revlog WHERE id >= ? AND type = 0",
+            day_start_ms(day_cutoff),
+        )
+        or 0
+    )
+
+
+def card_watermarks(col, deck_ids):
+    """Return {deck_id: (max card mod, card count)} in one grouped query"""
+    if not deck_ids:
+        return {}
+    return {
+        did: (mod, count)
+        for did, mod, count in col.db.all(
+            f"""
+        SELECT did, max(mod), count() FROM cards
+        WHERE did IN {ids2str(deck_ids)}
+        GROUP BY did"""
+        )
+    }
+
+
+def group_stamps(col, groups, day_cutoff, today, days_left=None):
+    """Build the input stamp of every deadline.
+
+    groups maps deadline deck ids to the deck ids they count and days_left,
+    if given, maps them to their days left. A deadline only needs recounting
+    when its stamp differs from the one stored with its counts.
+    """
+    deck_ids = set()
+    for dids in groups.values():
+        deck_ids.update(dids)
+    marks = card_watermarks(col, sorted(deck_ids))
+    revlog = revlog_high_water(col, day_cutoff)
+    stamps = {}
+    for deadline, dids in groups.items():
+        dids = sorted(dids)
+        group_marks = [marks[d] for d in dids if d in marks]
+        stamps[deadline] = {
+            "today": today,
+            "dayCutoff": day_cutoff,
+            "decks": dids,
+            "revlog": revlog,
+            "mod": max((mod for mod, _ in group_marks), default=0),
+            "cards": sum(count for _, count in group_marks),
+        }
+        if days_left is not None:
+            stamps[deadline]["daysLeft"] = days_left[deadline]
+    return stamps
+
+
+class Snapshot:
+    """Last computed result and input stamp per deadline deck id, for one profile"""
+
+    def __init__(self, path, profile):
+        self.path = path
+        self.profile = profile
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, encoding="utf8") as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data.setdefault(self.profile, {})
+
+    def lookup(self, deck_id, stamp):
+        """Cached ((new_cards, new_today), due reviews) for a deadline if its
+        stamp still matches"""
+        entry = self._load().get(str(deck_id))
+        if entry and entry.get("stamp") == stamp and "reviews" in entry:
+            return tuple(entry["counts"]), entry["reviews"]
+        return None
+
+    def record(self, deck_id, stamp, counts, reviews):
+        self._load()[str(deck_id)] = {
+            "stamp": stamp,
+            "counts": list(counts),
+            "reviews": reviews,
+        }
+
+    def prune(self, deck_ids):
+        """Forget deadlines that are no longer configured"""
+        entries = self._load()
+        for key in set(entries) - {str(deck_id) for deck_id in deck_ids}:
+            del entries[key]
+
+    def save(self):
+        if self._data is None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf8") as f:
+            json.dump(self._data, f)
+        os.replace(tmp, self.path)
@@ -0,0 +1,141 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: In-memory deadline config with batched writes, and the one-time
+#              migration of older config layouts.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+from contextlib import contextmanager
+
+# Version 1 kept profiles at the top level of the config; version 2 keeps
+# them under "deadlines" and records the version. Version 3 keys each
+# profile's deadlines by deck id, as {"<deck id>": {"name": ..., "date": ...}};
+# deadlines still keyed by deck name are converted by sync_profile the next
+# time their profile is open, since only its collection knows the ids.
+SCHEMA_VERSION = 3
+
+
+def migrate(config):
+    """Bring a config dict up to SCHEMA_VERSION in place. Returns True if it changed."""
+    if config.get("schemaVersion", 1) >= SCHEMA_VERSION:
+        return False
+    config.pop("test", None)
+    if "deadlines" not in config:
+        config["deadlines"] = {
+            profile: config.pop(profile)
+            for profile in list(config)
+            if isinstance(config[profile], dict)
+        }
+    config["schemaVersion"] = SCHEMA_VERSION
+    return True
+
+
+def sync_profile(profile_deadlines, index):
+    """Key a profile's deadlines by deck id and refresh their deck names.
+
+    One pass over the deadlines, using index (a built DeckIndex) for both
+    directions. Name-keyed deadlines whose deck exists are re-keyed by its
+    id; ones whose deck is gone are left as they are. Id-keyed deadlines
+    pick up the deck's current name after a rename or move.
+    Returns True if anything changed.
+    """
+    changed = False
+    for key, entry in list(profile_deadlines.items()):
+        if isinstance(entry, str):
+            # Version 2 entry: deck name -> date
+            deck_id = index.deck_id(key)
+            if deck_id is None:
+                continue
+            del profile_deadlines[key]
+            profile_deadlines[str(deck_id)] = {"name": key, "date": entry}
+            changed = True
+            continue
+        name = index.deck_name(int(key))
+        if name is not None and name != entry["name"]:
+            entry["name"] = name
+            changed = True
+    return changed
+
+
+def deadline_entries(profile_deadlines):
+    """Yield (key, deck id, deck name, date) for every deadline of a profile.
+
+    Works on both id-keyed and not yet converted name-keyed deadlines; the
+    latter have no deck id.
+    """
+    for key, entry in profile_deadlines.items():
+        if isinstance(entry, str):
+            yield key, None, key, entry
+        else:
+            yield key, int(key), entry["name"], entry["date"]
+
+
+def deck_deadlines(profile_deadlines, index):
+    """[(deck id, deck name, date)] for a profile, the form core.active_deadlines takes.
+
+    Decks are looked up by id in index (a built DeckIndex) and get their
+    current name. Deadlines whose deck was deleted, and name-keyed ones
+    sync_profile could not convert, are skipped rather than matched to
+    whatever deck has that name now.
+    """
+    deadlines = []
+    for _, deck_id, _, date in deadline_entries(profile_deadlines):
+        name = index.deck_name(deck_id) if deck_id is not None else None
+        if name is not None:
+            deadlines.append((deck_id, name, date))
+    return deadlines
+
+
+class DeadlineStore:
+    """Holds the add-on config in memory and writes it back in batches.
+
+    read() returns the stored config and write(config) persists it; inside
+    the add-on these are Anki's getConfig/writeConfig. Changes made inside a
+    batch() block, however many, are written once when the outermost block
+    exits.
+    """
+
+    def __init__(self, read, write):
+        self._read = read
+        self._write = write
+        self._config = None
+        self._depth = 0
+        self._dirty = False
+
+    def load(self):
+        """The config dict, read and migrated on first use"""
+        if self._config is None:
+            self._config = self._read() or {}
+            if migrate(self._config):
+                self._config_changed()
+        return self._config
+
+    def reload(self, *args):
+        """Forget the in-memory copy, eg after the config was edited elsewhere"""
+        self._config = None
+
+    def profile(self, name):
+        """Deadlines of a profile as {deck: date}, created if missing"""
+        return self.load()["deadlines"].setdefault(name, {})
+
+    def save(self):
+        """Write the config now, or at the end of the current batch"""
+        self._config_changed()
+
+    def _config_changed(self):
+        if self._depth:
+            self._dirty = True
+        else:
+            self._write(self._config)
+            self._dirty = False
+
+    @contextmanager
+    def batch(self):
+        """Group every save() inside the block into one write"""
+        self._depth += 1
+        try:
+            yield self.load()
+        finally:
+            self._depth -= 1
+            if not self._depth and self._dirty:
+                self._write(self._config)
+                self._dirty = False
@@ -0,0 +1,62 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Read-only table model shared by the deadline list and the
+#              results window: one row per entry, with a raw value role for
+#              sorting through a proxy.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+from aqt.qt import *
+
+# Role returning a column's raw value, used for sorting
+SortRole = Qt.ItemDataRole.UserRole
+
+
+class RowTableModel(QAbstractTableModel):
+    """A table with one row per entry of self.rows and a column per header.
+
+    Subclasses set headers and can override value() for computed columns,
+    sortValue() for how missing values sort and roleData() for other roles.
+    """
+
+    headers = ()
+
+    def __init__(self, parent=None):
+        QAbstractTableModel.__init__(self, parent)
+        self.rows = []
+
+    def value(self, row, column):
+        return row[column]
+
+    def sortValue(self, value, column):
+        # Missing values sort before every number
+        return -1 if value is None else value
+
+    def roleData(self, row, column, value, role):
+        return None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+        ):
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        value = self.value(row, index.column())
+        if role == Qt.ItemDataRole.DisplayRole:
+            return "" if value is None else str(value)
+        if role == SortRole:
+            return self.sortValue(value, index.column())
+        if role == Qt.ItemDataRole.ToolTipRole and index.column() == 0:
+            return value
+        return self.roleData(row, index.column(), value, role)
@@ -0,0 +1,65 @@
+"""Tests for the daily budget allocator in core.py, which needs no Anki."""
+
+import importlib
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "deadline2_tests"
+
+
+def load(module):
+    """Import one of the add-on's UI-free modules without running __init__"""
+    if PACKAGE not in sys.modules:
+        pkg = types.ModuleType(PACKAGE)
+        pkg.__path__ = [ROOT]
+        sys.modules[PACKAGE] = pkg
+    return importlib.import_module(f"{PACKAGE}.{module}")
+
+
+core = load("core")
+Pacing = core.Pacing
+
+
+def deadline(name, new_cards, days_left, new_today=0):
+    return Pacing(name, new_today, new_cards, days_left, 0)
+
+
+def test_empty():
+    assert core.allocate([], 10) == []
+
+
+def test_equal_dates_split_evenly():
+    a, b = core.allocate([deadline("A", 100, 10), deadline("B", 100, 10)], 10)
+    assert (a.per_day, a.shortfall) == (5, 50)
+    assert (b.per_day, b.shortfall) == (5, 50)
+
+
+def test_overdue_deadline_takes_today():
+    overdue, later = core.allocate(
+        [deadline("Overdue", 30, 0), deadline("Later", 20, 10)], 25
+    )
+    assert (overdue.per_day, overdue.shortfall) == (25, 5)
+    # Nothing is left today; the later deadline fits in the days after
+    assert (later.per_day, later.shortfall) == (0, 0)
+
+
+def test_shortfall():
+    (result,) = core.allocate([deadline("A", 100, 5, new_today=3)], 10)
+    assert result.per_day == 10
+    assert result.shortfall == 53
+
+
+def test_earliest_deadline_first():
+    later, sooner = core.allocate(
+        [deadline("Later", 40, 20), deadline("Sooner", 30, 3)], 10
+    )
+    assert (sooner.per_day, sooner.shortfall) == (10, 0)
+    assert (later.per_day, later.shortfall) == (0, 0)
+
+
+def test_fill_spreads_evenly_within_room():
+    assert core._fill([5, 1, 5], 7) == [3, 1, 3]
+    assert core._fill([2, 2], 10) == [2, 2]
+    assert core._fill([4, 4, 4], 4) == [2, 1, 1]
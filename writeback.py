@@ -0,0 +1,56 @@
+# Anki Deadline2
+# Anki 2.1 plugin
+# Description: Batched write-back of computed deck limits. Limits for every
+#              deadline are collected first and only the decks and options
+#              groups whose values actually changed are saved.
+# License: GNU GPL v3 <www.gnu.org/licenses/gpl.html>
+
+
+class LimitWriter:
+    """Collects new/review limits per deck and writes the changed ones in one go"""
+
+    def __init__(self):
+        self._limits = {}  # deck id -> (newLimit, reviewLimit)
+
+    def __len__(self):
+        return len(self._limits)
+
+    def set_limits(self, deck_id, per_day, review_limit=None):
+        """Queue limits for a deck. The review limit defaults to 10x the new limit."""
+        per_day = int(per_day)
+        if review_limit is None:
+            review_limit = per_day * 10
+        self._limits[deck_id] = (per_day, int(review_limit))
+
+    def apply(self, col):
+        """Save queued limits that differ from the collection.
+
+        The deck's options group also gets its "new per day" value updated so
+        the deck options screen shows the same number; a group shared by
+        decks with limits of their own shows the largest.
+        Returns the number of decks and options groups written.
+        """
+        written = 0
+        config_limits = {}
+        for deck_id, (per_day, review_limit) in self._limits.items():
+            deck = col.decks.get(deck_id, default=False)
+            if not deck:
+                continue
+            if deck.get("newLimit") != per_day or deck.get("reviewLimit") != review_limit:
+                deck["newLimit"] = per_day  # Set the deck-specific override
+                deck["reviewLimit"] = review_limit
+                col.decks.save(deck)
+                written += 1
+            config_id = deck.get("conf_id")
+            if config_id:
+                config_limits[config_id] = max(config_limits.get(config_id, 0), per_day)
+
+        for config_id, per_day in config_limits.items():
+            config = col.decks.get_config(config_id)
+            if config and config["new"]["perDay"] != per_day:
+                config["new"]["perDay"] = per_day
+                col.decks.update_config(config)
+                written += 1
+
+        self._limits = {}
+        return written